@@ -1,9 +1,27 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file
+from flask import (
+    Flask, Response, before_render_template, g, make_response, render_template, request, redirect, url_for,
+    jsonify, send_file, template_rendered
+)
 from forms import ModuleForm, StudyForm, AssignmentForm
-from utils import calculate_study_plan, generate_excel, generate_pdf, generate_html
+from utils import IncrementalPlanner, calculate_study_plan, plan_digest
+from exporters import get_exporter, render_export
+from plan_cache import PlanCache
+from artifact_cache import ArtifactCache
+from jobs import JobManager
+from scenarios import MAX_SCENARIOS, ScenarioPlanner, merge_settings
+from feasibility import FeasibilityIndex
+from holiday_index import HolidayIndex
+import metrics
+from models import MAX_DUE_DATE, MIN_DUE_DATE, Assignment, Module, StudySettings
+from bulk_import import ImportValidationError, parse_import_payload, validate_records, upsert_records
+from records import RecordCollection
+from snapshots import SnapshotStore
+from storage import WriteBehindWriter, create_storage, migrate_json_to_sqlite
+import atexit
+import math
 import os
-import json
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta
 
 app = Flask(__name__)
 
@@ -13,66 +31,241 @@ def inject_now():
     return {'now': datetime.now()}
 app.config['SECRET_KEY'] = 'your-secret-key'
 
-# Data storage (in a real app, this would be a database)
-modules_data = []
-assignments_data = []
-study_settings = {}
+# Data storage (in a real app, this would be a database). Modules, assignments, settings
+# and holidays are published together as immutable versioned snapshots, so requests on
+# other threads read one consistent version without locking while a change is saved.
+state = SnapshotStore()
 
-# File paths for saving configuration
+# Storage backend for saving configuration ('json' files or a shared 'sqlite' database)
 CONFIG_DIR = 'config'
-MODULES_FILE = os.path.join(CONFIG_DIR, 'modules.json')
-ASSIGNMENTS_FILE = os.path.join(CONFIG_DIR, 'assignments.json')
-SETTINGS_FILE = os.path.join(CONFIG_DIR, 'settings.json')
+app.config['STORAGE_BACKEND'] = os.environ.get('STUDYPLANNER_STORAGE', 'json')
+app.config['STORAGE_PATH'] = os.environ.get('STUDYPLANNER_DB', os.path.join(CONFIG_DIR, 'studyplanner.db'))
+app.config['STORAGE_USER'] = os.environ.get('STUDYPLANNER_USER', 'default')
+app.config['STORAGE_FSYNC'] = os.environ.get('STUDYPLANNER_FSYNC', 'file')
+app.config['SAVE_DELAY'] = float(os.environ.get('STUDYPLANNER_SAVE_DELAY', '0.5'))
+storage = create_storage(
+    app.config['STORAGE_BACKEND'], CONFIG_DIR,
+    sqlite_path=app.config['STORAGE_PATH'], user=app.config['STORAGE_USER'],
+    fsync=app.config['STORAGE_FSYNC']
+)
 
-# Create config directory if it doesn't exist
-if not os.path.exists(CONFIG_DIR):
-    os.makedirs(CONFIG_DIR)
+def parse_stored(record_type, records):
+    """
+    Parse stored records once
+    
+    Records that are invalid are logged and returned separately, unchanged,
+    so they can be saved back rather than lost.
+    
+    Returns:
+        Tuple of (parsed records, invalid records)
+    """
+    parsed = []
+    invalid = []
+    for record in records:
+        try:
+            parsed.append(record_type.from_dict(record))
+        except (AttributeError, ValueError) as e:
+            app.logger.warning("Keeping invalid %s %r unchanged: %s", record_type.__name__.lower(), record, e)
+            invalid.append(record)
+    return parsed, invalid
+
+def reserve_ids(id_counters, name, records):
+    """Move a collection's id counter past the ids of records that could not be parsed"""
+    for record in records:
+        record_id = record.get('id') if isinstance(record, dict) else None
+        if isinstance(record_id, int) and record_id > id_counters.get(name, 0):
+            id_counters[name] = record_id
+
+def parse_settings(settings):
+    """Parse the planning fields of stored study settings, falling back to the defaults"""
+    try:
+        return StudySettings.from_dict(settings)
+    except ValueError as e:
+        app.logger.warning("Ignoring invalid study settings: %s", e)
+        return StudySettings({})
 
 # Load saved configuration if available
 def load_configuration():
-    global modules_data, assignments_data, study_settings
-    
-    # Load modules
-    if os.path.exists(MODULES_FILE):
-        with open(MODULES_FILE, 'r') as f:
-            modules_data = json.load(f)
-    
-    # Load assignments
-    if os.path.exists(ASSIGNMENTS_FILE):
-        with open(ASSIGNMENTS_FILE, 'r') as f:
-            assignments_data = json.load(f)
+    with state.edit() as draft:
+        # Save our own pending edits first, so reloading another worker's changes cannot discard
+        # them (the write lock keeps new edits out until the reloaded version is published)
+        config_writer.flush()
+        stored_modules, stored_assignments, study_settings = storage.load_all()
+        
+        # Index modules and assignments by id, with ids allocated from persistent counters
+        # (saved with the settings, but kept apart from the settings the user edits)
+        id_counters = study_settings.pop('id_counters', {})
+        modules_parsed, modules_invalid = parse_stored(Module, stored_modules)
+        assignments_parsed, assignments_invalid = parse_stored(Assignment, stored_assignments)
+        reserve_ids(id_counters, 'modules', modules_invalid)
+        reserve_ids(id_counters, 'assignments', assignments_invalid)
+        modules_data = RecordCollection(modules_parsed, id_counters, 'modules')
+        assignments_data = RecordCollection(assignments_parsed, id_counters, 'assignments', group_by='module_id')
+        
+        draft.settings = study_settings
+        draft.id_counters = id_counters
+        draft.unparsed = {'modules': modules_invalid, 'assignments': assignments_invalid}
+        draft.plan_settings = parse_settings(study_settings)
+        draft.modules = modules_data
+        draft.assignments = assignments_data
+        
+        # Generated UK bank holidays, with the user's selections and hours applied
+        draft.bank_holidays = HolidayIndex(study_settings.get('bank_holidays', []))
     
-    # Load study settings
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, 'r') as f:
-            study_settings = json.load(f)
+    # Save any ids given to records that were missing one or shared one
+    if modules_data.repaired or assignments_data.repaired:
+        save_configuration()
+
+def current_snapshot():
+    """Return the configuration snapshot for this request (taken once, on first use)"""
+    if 'snapshot' not in g:
+        g.snapshot = state.current()
+    return g.snapshot
+
+def stored_records(snapshot, name):
+    """Return a snapshot's modules or assignments as saved, with any that could not be parsed"""
+    return getattr(snapshot, name).to_dicts() + snapshot.unparsed.get(name, [])
+
+def stored_settings(snapshot):
+    """Return a snapshot's study settings as saved, with the id counters"""
+    return dict(snapshot.settings, id_counters=snapshot.id_counters)
+
+# Changed collections are saved together shortly after a burst of mutations
+config_writer = WriteBehindWriter(storage, {
+    'modules': lambda: stored_records(state.current(), 'modules'),
+    'assignments': lambda: stored_records(state.current(), 'assignments'),
+    'settings': lambda: stored_settings(state.current())
+}, delay=app.config['SAVE_DELAY'])
+
+# Save any pending changes when the process exits
+atexit.register(config_writer.flush)
 
 # Save configuration
-def save_configuration():
-    # Save modules
-    with open(MODULES_FILE, 'w') as f:
-        json.dump(modules_data, f, indent=2)
-    
-    # Save assignments
-    with open(ASSIGNMENTS_FILE, 'w') as f:
-        json.dump(assignments_data, f, indent=2)
-    
-    # Save study settings
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(study_settings, f, indent=2)
+def save_configuration(*collections):
+    """Mark the changed collections (default: all) to be saved"""
+    config_writer.mark_dirty(*collections)
+
+# Cache of computed study plans, keyed on the version of the snapshot they were planned
+# from. Each plan is hashed once so exports and the guide can use it as an ETag.
+plan_cache = PlanCache()
+
+# Capacity and demand prefix sums for slack queries, rebuilt with the plan
+feasibility_cache = PlanCache(max_entries=4)
+
+# Generated export files, keyed on the plan hash and format
+app.config['EXPORT_CACHE_DIR'] = os.environ.get('STUDYPLANNER_EXPORT_CACHE', 'export_cache')
+app.config['EXPORT_CACHE_BYTES'] = int(os.environ.get('STUDYPLANNER_EXPORT_CACHE_BYTES', 100 * 1024 * 1024))
+export_cache = ArtifactCache(app.config['EXPORT_CACHE_DIR'], app.config['EXPORT_CACHE_BYTES'])
+
+# Planner that keeps its previous allocation so edits only replan what changed
+planner = IncrementalPlanner()
+
+# Optional background jobs: with STUDYPLANNER_WORKERS set, plans and exports can be
+# computed in a pool of worker processes through /api/jobs instead of in the request
+app.config['JOB_WORKERS'] = int(os.environ.get('STUDYPLANNER_WORKERS', '0'))
+job_manager = JobManager(app.config['JOB_WORKERS']) if app.config['JOB_WORKERS'] > 0 else None
+if job_manager:
+    atexit.register(job_manager.shutdown)
+
+# Optional metrics: with STUDYPLANNER_METRICS set, request latencies and the phases of
+# planning, exporting and template rendering are timed and served at /metrics
+app.config['METRICS'] = os.environ.get('STUDYPLANNER_METRICS', '').lower() in ('1', 'true', 'yes')
+metrics.enable(app.config['METRICS'])
+
+def cache_counts():
+    """Hits and misses of the plan and export caches, as served at /metrics"""
+    counts = {}
+    for name, cache in (('plan', plan_cache), ('feasibility', feasibility_cache), ('export', export_cache)):
+        stats = cache.stats()
+        counts[(name, 'hit')] = stats['hits']
+        counts[(name, 'miss')] = stats['misses']
+    return counts
+
+metrics.registry.counter_function(
+    'studyplanner_cache_requests_total', 'Cache lookups, by cache and result', ('cache', 'result'), cache_counts
+)
+
+def plan_args(snapshot):
+    """Arguments of the planner for a snapshot's configuration"""
+    return (snapshot.modules.to_list(), snapshot.plan_settings, snapshot.bank_holidays, snapshot.assignments.to_list())
+
+def get_study_plan_entry():
+    """Return the (study plan, content hash) pair for the current configuration"""
+    snapshot = current_snapshot()
+    return plan_cache.get_entry(
+        lambda: planner.plan(*plan_args(snapshot)), snapshot.version,
+        digest=lambda study_plan: plan_digest(study_plan, snapshot.modules)
+    )
+
+def compute_feasibility_index(snapshot):
+    scenario_planner = ScenarioPlanner(
+        snapshot.modules.to_list(), snapshot.bank_holidays, snapshot.assignments.to_list()
+    )
+    return FeasibilityIndex(
+        scenario_planner.tasks, scenario_planner.calendar(snapshot.plan_settings),
+        snapshot.plan_settings.weekly_hours, snapshot.bank_holidays
+    )
+
+def get_feasibility_index():
+    """Return the feasibility index for the current configuration, using the cache"""
+    snapshot = current_snapshot()
+    return feasibility_cache.get(lambda: compute_feasibility_index(snapshot), snapshot.version)
+
+def not_modified(etag):
+    """Return a 304 response if the client already has this ETag, otherwise None"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+def listed_holidays(bank_holidays):
+    """Bank holidays shown on the study page: this year and the next HOLIDAY_YEARS - 1"""
+    year = datetime.now().year
+    return bank_holidays.between(date(year, 1, 1), date(year + app.config['HOLIDAY_YEARS'] - 1, 12, 31))
 
 # Load configuration at startup
+app.config['HOLIDAY_YEARS'] = int(os.environ.get('STUDYPLANNER_HOLIDAY_YEARS', '2'))
 load_configuration()
-bank_holidays = [
-    {"date": "2025-01-01", "name": "New Year's Day", "selected": False, "hours": 0},
-    {"date": "2025-04-18", "name": "Good Friday", "selected": False, "hours": 0},
-    {"date": "2025-04-21", "name": "Easter Monday", "selected": False, "hours": 0},
-    {"date": "2025-05-05", "name": "Early May Bank Holiday", "selected": False, "hours": 0},
-    {"date": "2025-05-26", "name": "Spring Bank Holiday", "selected": False, "hours": 0},
-    {"date": "2025-08-25", "name": "Summer Bank Holiday", "selected": False, "hours": 0},
-    {"date": "2025-12-25", "name": "Christmas Day", "selected": False, "hours": 0},
-    {"date": "2025-12-26", "name": "Boxing Day", "selected": False, "hours": 0}
-]
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, (request.method, endpoint))
+        metrics.REQUESTS_TOTAL.inc((request.method, endpoint, str(response.status_code)))
+    return response
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    if metrics.enabled:
+        g.setdefault('template_timers', []).append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def record_template_metrics(sender, template, context, **extra):
+    timers = g.get('template_timers')
+    if timers:
+        metrics.PHASE_SECONDS.observe(time.perf_counter() - timers.pop(), ('render_template', template.name))
+
+@app.before_request
+def reload_changed_configuration():
+    # Another worker may have saved changes to the shared storage (our own pending
+    # edits are saved before the reload)
+    if storage.has_changed():
+        load_configuration()
+
+@app.cli.command('import-json')
+def import_json():
+    """Import the JSON config files into the SQLite storage backend."""
+    counts = migrate_json_to_sqlite(CONFIG_DIR, app.config['STORAGE_PATH'], app.config['STORAGE_USER'])
+    print(f"Imported {counts['modules']} modules and {counts['assignments']} assignments "
+          f"into {app.config['STORAGE_PATH']} for user '{app.config['STORAGE_USER']}'")
 
 @app.route('/')
 def index():
@@ -84,34 +277,32 @@ def modules():
     if request.method == 'POST':
         module_data = request.json
         if module_data:
+            try:
+                module = Module.from_dict(module_data)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)})
+            
             # Add or update module
-            for i, module in enumerate(modules_data):
-                if module['id'] == module_data.get('id'):
-                    modules_data[i] = module_data
-                    break
-            else:
-                # New module
-                if not module_data.get('id'):
-                    module_data['id'] = len(modules_data) + 1
-                modules_data.append(module_data)
+            with state.edit() as draft:
+                draft.modules.upsert(module)
             
-            # Save configuration
-            save_configuration()
+            # Save configuration (the id counters are saved with the settings)
+            save_configuration('modules', 'settings')
             
-            return jsonify({"success": True, "modules": modules_data})
+            return jsonify({"success": True, "modules": draft.modules.to_dicts()})
         return jsonify({"success": False, "error": "Invalid data"})
-    return render_template('modules.html', form=form, modules=modules_data)
+    return render_template('modules.html', form=form, modules=current_snapshot().modules)
 
 @app.route('/delete_module/<int:module_id>', methods=['POST'])
 def delete_module(module_id):
-    global modules_data, assignments_data
-    modules_data = [m for m in modules_data if m['id'] != module_id]
-    assignments_data = [a for a in assignments_data if a['module_id'] != module_id]
+    with state.edit() as draft:
+        draft.modules.remove(module_id)
+        draft.assignments.remove_group(module_id)
     
     # Save configuration
-    save_configuration()
+    save_configuration('modules', 'assignments')
     
-    return jsonify({"success": True, "modules": modules_data})
+    return jsonify({"success": True, "modules": draft.modules.to_dicts()})
 
 @app.route('/assignments/<int:module_id>', methods=['GET', 'POST'])
 def assignments(module_id):
@@ -119,52 +310,78 @@ def assignments(module_id):
     form.module_id.data = module_id
     
     # Find the module
-    module = next((m for m in modules_data if m['id'] == module_id), None)
+    snapshot = current_snapshot()
+    module = snapshot.modules.get(module_id)
     if not module:
         return redirect(url_for('modules'))
     
     if request.method == 'POST':
         assignment_data = request.json
         if assignment_data:
-            # Add or update assignment
-            for i, assignment in enumerate(assignments_data):
-                if assignment['id'] == assignment_data.get('id'):
-                    assignments_data[i] = assignment_data
-                    break
-            else:
-                # New assignment
-                if not assignment_data.get('id'):
-                    assignment_data['id'] = len(assignments_data) + 1
-                assignment_data['module_id'] = module_id
-                assignments_data.append(assignment_data)
+            try:
+                with state.edit() as draft:
+                    # Add or update assignment
+                    if assignment_data.get('id') not in draft.base.assignments:
+                        # New assignment
+                        assignment_data['module_id'] = module_id
+                    draft.assignments.upsert(Assignment.from_dict(assignment_data))
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)})
             
-            # Save configuration
-            save_configuration()
+            # Save configuration (the id counters are saved with the settings)
+            save_configuration('assignments', 'settings')
             
-            return jsonify({"success": True, "assignments": [a for a in assignments_data if a['module_id'] == module_id]})
+            return jsonify({"success": True, "assignments": assignment_dicts(draft.assignments, module_id)})
         return jsonify({"success": False, "error": "Invalid data"})
     
     # Get assignments for this module
-    module_assignments = [a for a in assignments_data if a['module_id'] == module_id]
+    module_assignments = snapshot.assignments.group(module_id)
     return render_template('assignments.html', form=form, module=module, assignments=module_assignments)
 
+def assignment_dicts(assignments_data, module_id):
+    return [assignment.to_dict() for assignment in assignments_data.group(module_id)]
+
 @app.route('/delete_assignment/<int:assignment_id>', methods=['POST'])
 def delete_assignment(assignment_id):
-    global assignments_data
-    # Get module_id before deleting
-    assignment = next((a for a in assignments_data if a['id'] == assignment_id), None)
+    assignment = current_snapshot().assignments.get(assignment_id)
     if not assignment:
         return jsonify({"success": False, "error": "Assignment not found"})
     
-    module_id = assignment['module_id']
-    assignments_data = [a for a in assignments_data if a['id'] != assignment_id]
+    module_id = assignment.module_id
+    with state.edit() as draft:
+        draft.assignments.remove(assignment_id)
     
     # Save configuration
-    save_configuration()
+    save_configuration('assignments')
     
     return jsonify({
         "success": True, 
-        "assignments": [a for a in assignments_data if a['module_id'] == module_id]
+        "assignments": assignment_dicts(draft.assignments, module_id)
+    })
+
+@app.route('/import', methods=['POST'])
+def bulk_import():
+    # Parse and validate the whole payload before changing anything
+    try:
+        new_modules, new_assignments = parse_import_payload(request.get_data(as_text=True), request.content_type)
+        with state.edit() as draft:
+            new_modules, new_assignments = validate_records(
+                new_modules, new_assignments, draft.base.modules.ids()
+            )
+            
+            # Upsert modules and assignments against their id indexes
+            modules_created, modules_updated = upsert_records(draft.modules, new_modules)
+            assignments_created, assignments_updated = upsert_records(draft.assignments, new_assignments)
+    except ImportValidationError as e:
+        return jsonify({"success": False, "error": str(e), "errors": e.errors})
+    
+    # Save configuration once for the whole import
+    save_configuration('modules', 'assignments', 'settings')
+    
+    return jsonify({
+        "success": True,
+        "modules": {"created": modules_created, "updated": modules_updated},
+        "assignments": {"created": assignments_created, "updated": assignments_updated}
     })
 
 @app.route('/study', methods=['GET', 'POST'])
@@ -173,55 +390,285 @@ def study():
     if request.method == 'POST':
         data = request.json
         if data:
-            study_settings.update(data)
+            try:
+                with state.edit() as draft:
+                    # Validate the updated settings before saving them
+                    draft.plan_settings = StudySettings.from_dict(dict(draft.base.settings, **data))
+                    draft.settings.update(data)
+                    draft.settings.update(draft.plan_settings.to_dict())
+                    
+                    # Ids are allocated by the app, so posted (or echoed back) counters are ignored
+                    draft.settings.pop('id_counters', None)
+            except (TypeError, ValueError) as e:
+                return jsonify({"success": False, "error": str(e)})
             
             # Save configuration
-            save_configuration()
+            save_configuration('settings')
             
-            return jsonify({"success": True, "settings": study_settings})
+            return jsonify({"success": True, "settings": draft.settings})
         return jsonify({"success": False, "error": "Invalid data"})
-    return render_template('study.html', form=form, settings=study_settings, holidays=bank_holidays)
+    snapshot = current_snapshot()
+    return render_template(
+        'study.html', form=form, settings=snapshot.settings, holidays=listed_holidays(snapshot.bank_holidays)
+    )
 
 @app.route('/update_holidays', methods=['POST'])
 def update_holidays():
-    global bank_holidays
     data = request.json
-    if data and 'holidays' in data:
-        bank_holidays = data['holidays']
-        
-        # Save bank holidays in study settings
-        study_settings['bank_holidays'] = bank_holidays
-        save_configuration()
+    if data and isinstance(data.get('holidays'), list):
+        try:
+            with state.edit() as draft:
+                draft.bank_holidays.apply(data['holidays'])
+                
+                # Save the user's holiday selections in study settings
+                draft.settings['bank_holidays'] = draft.bank_holidays.to_settings()
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)})
+        save_configuration('settings')
         
-        return jsonify({"success": True, "holidays": bank_holidays})
+        return jsonify({"success": True, "holidays": listed_holidays(draft.bank_holidays)})
     return jsonify({"success": False, "error": "Invalid data"})
 
 @app.route('/guide')
 def guide():
-    if not modules_data or not study_settings:
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
         return render_template('guide.html', has_data=False)
     
-    study_plan = calculate_study_plan(modules_data, study_settings, bank_holidays, assignments_data)
-    return render_template('guide.html', has_data=True, study_plan=study_plan)
+    study_plan, digest = get_study_plan_entry()
+    etag = f"guide-{digest}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    response = make_response(render_template(
+        'guide.html', has_data=True, unmet=study_plan.unmet_hours(), async_jobs=job_manager is not None
+    ))
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/plan')
+def api_plan():
+    # Dates are YYYY-MM-DD; the end date is exclusive, matching FullCalendar's visible range
+    start = request.args.get('start', '')
+    end = request.args.get('end', '')
+    try:
+        start_date = datetime.strptime(start, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"success": False, "error": "start and end must be YYYY-MM-DD dates"})
+    
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
+        return jsonify({"success": True, "start": start, "end": end, "events": []})
+    
+    study_plan, digest = get_study_plan_entry()
+    etag = f"api-{digest}-{start}-{end}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    response = jsonify({
+        "success": True,
+        "start": start,
+        "end": end,
+        "events": study_plan.events_between(start_date, end_date),
+        "unmet": study_plan.unmet_hours()
+    })
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/scenarios', methods=['POST'])
+def scenarios():
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
+        return jsonify({"success": False, "error": "No data to plan"})
+    
+    payload = request.get_json(silent=True) or {}
+    variants = payload.get('variants')
+    if not isinstance(variants, list) or not variants:
+        return jsonify({"success": False, "error": "variants must be a non-empty list of settings"})
+    if len(variants) > MAX_SCENARIOS:
+        return jsonify({"success": False, "error": f"At most {MAX_SCENARIOS} variants can be compared at once"})
+    
+    try:
+        variant_settings = [merge_settings(snapshot.plan_settings, variant) for variant in variants]
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)})
+    
+    # Every variant shares the parsed modules, assignments, holidays and calendar
+    scenario_planner = ScenarioPlanner(
+        snapshot.modules.to_list(), snapshot.bank_holidays, snapshot.assignments.to_list()
+    )
+    return jsonify({
+        "success": True,
+        "current": scenario_planner.evaluate(snapshot.plan_settings),
+        "variants": [
+            dict(scenario_planner.evaluate(settings), settings=settings.to_dict())
+            for settings in variant_settings
+        ]
+    })
+
+@app.route('/api/feasibility')
+def feasibility():
+    # With no arguments, returns the slack before every deadline. With due_date and a
+    # module_id (or hours), checks whether a new assignment would fit; with date, returns
+    # the spare hours up to that date.
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
+        return jsonify({"success": False, "error": "No data to plan"})
+    
+    due = request.args.get('due_date')
+    day = request.args.get('date')
+    try:
+        due_date = datetime.strptime(due, '%Y-%m-%d').date() if due else None
+        day = datetime.strptime(day, '%Y-%m-%d').date() if day else None
+    except ValueError:
+        return jsonify({"success": False, "error": "Dates must be YYYY-MM-DD"})
+    
+    # Queries are kept to the window due dates can be set in, so submission dates stay valid
+    # and counting capacity past the plan never generates holidays for far-off years
+    if any(value and not MIN_DUE_DATE <= value <= MAX_DUE_DATE for value in (due_date, day)):
+        return jsonify({
+            "success": False,
+            "error": f"Dates must be between {MIN_DUE_DATE.isoformat()} and {MAX_DUE_DATE.isoformat()}"
+        }), 400
+    
+    index = get_feasibility_index()
+    if day:
+        return jsonify({"success": True, "date": day.isoformat(), "slack": round(index.slack_at(day), 2)})
+    if not due_date:
+        return jsonify(dict(index.summary(), success=True))
+    
+    # A module's assignments need its hours and are submitted its days_before ahead of the due date
+    submission_date = due_date
+    hours = request.args.get('hours')
+    module_id = request.args.get('module_id', type=int)
+    if module_id is not None:
+        module = snapshot.modules.get(module_id)
+        if not module:
+            return jsonify({"success": False, "error": "Module not found"})
+        submission_date = due_date - timedelta(days=module.days_before)
+        hours = hours or module.hours_required
+    try:
+        hours = float(hours)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "module_id or hours is required"})
+    if not math.isfinite(hours) or hours <= 0:
+        return jsonify({"success": False, "error": "hours must be a positive number"})
+    
+    slack = index.slack_with_task(hours, submission_date)
+    return jsonify({
+        "success": True,
+        "due_date": due_date.isoformat(),
+        "submission_date": submission_date.isoformat(),
+        "hours": hours,
+        "feasible": slack >= -1e-9,
+        "slack": round(slack, 2),
+        "submission_slack": round(index.slack_at(submission_date) - hours, 2)
+    })
 
 @app.route('/export/<format>')
 def export(format):
-    if not modules_data or not study_settings:
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
         return jsonify({"success": False, "error": "No data to export"})
     
-    study_plan = calculate_study_plan(modules_data, study_settings, bank_holidays, assignments_data)
-    
-    if format == 'excel':
-        file_path = generate_excel(study_plan)
-        return send_file(file_path, as_attachment=True, download_name="study_plan.xlsx")
-    elif format == 'pdf':
-        file_path = generate_pdf(study_plan)
-        return send_file(file_path, as_attachment=True, download_name="study_plan.pdf")
-    elif format == 'html':
-        file_path = generate_html(study_plan)
-        return send_file(file_path, as_attachment=True, download_name="study_plan.html")
-    else:
+    exporter = get_exporter(format)
+    if not exporter:
         return jsonify({"success": False, "error": "Invalid format"})
+    
+    # Exports are identified by the plan's content hash
+    study_plan, digest = get_study_plan_entry()
+    etag = f"{format}-{digest}"
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    # Serve a previously generated file for the same plan
+    path = export_cache.get(etag)
+    if path:
+        return send_file(
+            path, mimetype=exporter.mimetype, as_attachment=True, download_name=exporter.download_name, etag=etag
+        )
+    
+    # Generate the export, streaming it to the client while it is cached
+    response = Response(
+        export_cache.stream_into(etag, exporter.render(study_plan, snapshot.modules.to_list())),
+        mimetype=exporter.mimetype,
+        headers={'Content-Disposition': f'attachment; filename={exporter.download_name}'}
+    )
+    response.set_etag(etag)
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics.enabled:
+        # A 404, so a scraper reports the target as missing rather than healthy with no data
+        return jsonify({"success": False, "error": "Metrics are disabled (set STUDYPLANNER_METRICS=1)"}), 404
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    if not job_manager:
+        return jsonify({"success": False, "error": "Background jobs are not enabled"})
+    snapshot = current_snapshot()
+    if not snapshot.modules or not snapshot.settings:
+        return jsonify({"success": False, "error": "No data to plan"})
+    
+    payload = request.get_json(silent=True) or {}
+    kind = payload.get('kind', 'plan')
+    format = payload.get('format')
+    if kind not in ('plan', 'export'):
+        return jsonify({"success": False, "error": "Job kind must be 'plan' or 'export'"})
+    if kind == 'export' and not get_exporter(format):
+        return jsonify({"success": False, "error": "Invalid format"})
+    
+    key = plan_cache.current_key(snapshot.version)
+    entry = plan_cache.peek(key)
+    args = plan_args(snapshot)
+    modules = args[0]
+    digest = lambda study_plan: plan_digest(study_plan, modules)
+    
+    if kind == 'plan':
+        if entry:
+            job = job_manager.finished(kind, {"digest": entry[1]})
+        else:
+            job = job_manager.submit((kind, key), kind, [
+                (calculate_study_plan, args, lambda study_plan: {"digest": plan_cache.put(key, study_plan, digest)[1]})
+            ])
+        return jsonify({"success": True, "job": job.to_dict()})
+    
+    # Exports are saved to the export cache, so the download link serves them from there
+    result = {"download_url": url_for('export', format=format)}
+    if entry and export_cache.get(f"{format}-{entry[1]}"):
+        job = job_manager.finished(kind, result)
+    else:
+        # The plan's hash, which names the cached export, is known once the plan is
+        plan_entries = [entry] if entry else []
+        
+        def store_plan(study_plan):
+            plan_entries.append(plan_cache.put(key, study_plan, digest))
+            return study_plan
+        
+        def store_export(data):
+            export_cache.put(f"{format}-{plan_entries[0][1]}", data)
+            return result
+        
+        if entry:
+            stages = [(render_export, (entry[0], format, modules), store_export)]
+        else:
+            stages = [(calculate_study_plan, args, store_plan), (render_export, (format, modules), store_export)]
+        job = job_manager.submit((kind, format, key), kind, stages)
+    
+    return jsonify({"success": True, "job": job.to_dict()})
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id) if job_manager else None
+    if not job:
+        return jsonify({"success": False, "error": "Job not found"})
+    return jsonify({"success": True, "job": job.to_dict()})
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+import time
+
+class ArtifactCache:
+    """
+    Bounded on-disk cache of generated export files
+    
+    Files are stored under a content key (a hash of the study plan and the
+    export format), so an unchanged plan is served from disk instead of being
+    regenerated. When the total size exceeds `max_bytes`, the least recently
+    used files are evicted.
+    
+    Args:
+        directory: Directory holding the cached files
+        max_bytes: Maximum total size of the cached files
+    """
+    
+    def __init__(self, directory, max_bytes=100 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        # Remove stale temp files left behind by interrupted writes
+        stale_before = time.time() - 3600
+        for entry in os.scandir(directory):
+            if entry.name.startswith('.tmp-') and entry.stat().st_mtime < stale_before:
+                os.unlink(entry.path)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+    
+    def get(self, key):
+        """Return the path of the cached file for key, or None"""
+        path = self._path(key)
+        try:
+            # Touch the file so eviction treats it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+    
+    def stream_into(self, key, chunks):
+        """
+        Yield chunks while writing them to the cache under key
+        
+        The file is only added to the cache once every chunk has been written,
+        so a client disconnecting mid-download never leaves a partial file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        committed = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+                    yield chunk
+            os.replace(tmp_path, self._path(key))
+            committed = True
+        finally:
+            if not committed:
+                os.unlink(tmp_path)
+        
+        self.evict()
+    
+    def put(self, key, data):
+        """Store data generated elsewhere (such as a background job) under key"""
+        for _ in self.stream_into(key, (data,)):
+            pass
+    
+    def evict(self):
+        """Delete the least recently used files until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.startswith('.tmp-'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+    
+    def stats(self):
+        """Return cache counters as a dictionary"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'max_bytes': self.max_bytes}
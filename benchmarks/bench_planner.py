@@ -0,0 +1,46 @@
+"""
+Benchmark for the study planner
+
+Builds a synthetic catalogue of modules and assignments spread over a multi-year
+horizon and times calculate_study_plan on it.
+
+Usage:
+    python benchmarks/bench_planner.py [--assignments N] [--years Y] [--repeat R]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import STRATEGIES
+from utils import calculate_study_plan
+from workloads import build_workload
+
+NUM_MODULES = 50
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--assignments', type=int, default=10000)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--strategy', choices=STRATEGIES, default='greedy')
+    args = parser.parse_args()
+    
+    modules, assignments, study_settings, bank_holidays = build_workload(
+        NUM_MODULES, args.assignments // NUM_MODULES, args.years, holiday_density=1 / 45
+    )
+    study_settings.strategy = args.strategy
+    
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        calculate_study_plan(modules, study_settings, bank_holidays, assignments)
+        timings.append(time.perf_counter() - started)
+    
+    print(f"calculate_study_plan ({args.strategy}): {args.assignments} assignments over {args.years:g} years")
+    print(f"  best {min(timings) * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms over {args.repeat} runs")
+
+if __name__ == '__main__':
+    main()
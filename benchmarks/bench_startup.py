@@ -0,0 +1,64 @@
+"""
+Startup-time benchmark for the web app
+
+Imports `app` in fresh interpreters and fails if the best import time exceeds
+a budget, or if an exporter dependency (such as openpyxl) was imported eagerly.
+
+Usage:
+    python benchmarks/bench_startup.py [--budget SECONDS] [--repeat R]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only be imported when an export is first requested
+LAZY_MODULES = ('openpyxl', 'excel_export', 'pdf_export', 'html_export', 'pandas')
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+eager = [name for name in {lazy!r} if name in sys.modules]
+print(elapsed, ','.join(eager))
+"""
+
+def measure_import():
+    """Import app in a fresh interpreter, returning (seconds, eagerly imported lazy modules)"""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(lazy=LAZY_MODULES)],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.split()
+    elapsed = float(output[0])
+    eager = output[1].split(',') if len(output) > 1 else []
+    return elapsed, eager
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget', type=float, default=1.0, help='maximum import time in seconds')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    timings = []
+    eager = []
+    for _ in range(args.repeat):
+        elapsed, eager = measure_import()
+        timings.append(elapsed)
+    
+    best = min(timings)
+    print(f"import app: best {best * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms over {args.repeat} runs")
+    
+    failed = False
+    if best > args.budget:
+        print(f"FAIL: import time exceeds the {args.budget * 1000:.0f} ms budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
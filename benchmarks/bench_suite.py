@@ -0,0 +1,182 @@
+"""
+Benchmark suite for the planner, exporters and storage
+
+Runs each benchmark against the seeded workloads in workloads.py, covering both
+the legacy module due date planner and the assignments planner, and can save
+the timings as a JSON baseline or compare them with one.
+
+Usage:
+    python benchmarks/bench_suite.py [--workload NAME] [--filter TEXT] [--repeat R]
+                                     [--save PATH] [--compare PATH] [--threshold FRACTION]
+
+With --compare, exits with status 1 if any benchmark's best time is slower than
+the baseline's by more than the threshold (default 0.25, i.e. 25%).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (
+    allocate_leave_days, build_study_calendar, calculate_study_plan, distribute_study_hours,
+    holiday_index, module_tasks, modules_end_date, sort_modules
+)
+from models import StudySettings
+from study_plan import StudyPlan
+from html_export import generate_html_content
+from excel_export import generate_excel
+from storage import JsonStorage, SqliteStorage, WriteBehindWriter
+from workloads import WORKLOADS, build_workload
+
+# Storage directories for the save benchmarks, removed when the interpreter exits
+TEMP_DIRECTORIES = []
+
+def study_calendar_for(modules, study_settings, bank_holidays):
+    """Build the legacy planner's calendar for a workload, before leave is allocated"""
+    start_date = datetime.now().date()
+    end_date = modules_end_date(sort_modules(modules), start_date)
+    return build_study_calendar(start_date, end_date, study_settings.weekly_hours, holiday_index(bank_holidays))
+
+def bench_plan_legacy(modules, assignments, study_settings, bank_holidays):
+    return None, lambda _: calculate_study_plan(modules, study_settings, bank_holidays, [])
+
+def bench_plan_greedy(modules, assignments, study_settings, bank_holidays):
+    settings = StudySettings.from_dict(dict(study_settings.to_dict(), strategy='greedy'))
+    return None, lambda _: calculate_study_plan(modules, settings, bank_holidays, assignments)
+
+def bench_plan_edf(modules, assignments, study_settings, bank_holidays):
+    settings = StudySettings.from_dict(dict(study_settings.to_dict(), strategy='edf'))
+    return None, lambda _: calculate_study_plan(modules, settings, bank_holidays, assignments)
+
+def bench_allocate_leave_days(modules, assignments, study_settings, bank_holidays):
+    # Leave marks the calendar in place, so each run gets a fresh one
+    setup = lambda: study_calendar_for(modules, study_settings, bank_holidays)
+    return setup, lambda study_calendar: allocate_leave_days(study_calendar, study_settings.leave_days)
+
+def bench_distribute_study_hours(modules, assignments, study_settings, bank_holidays):
+    study_calendar = study_calendar_for(modules, study_settings, bank_holidays)
+    allocate_leave_days(study_calendar, study_settings.leave_days)
+    tasks = module_tasks(sort_modules(modules))
+    
+    def run(_):
+        study_plan = StudyPlan()
+        for name, hours, submission_date, due_date in tasks:
+            distribute_study_hours(study_plan, name, hours, submission_date, due_date, study_calendar)
+        return study_plan
+    
+    return None, run
+
+def bench_html_export(modules, assignments, study_settings, bank_holidays):
+    study_plan = calculate_study_plan(modules, study_settings, bank_holidays, assignments)
+    return None, lambda _: generate_html_content(study_plan)
+
+def bench_excel_export(modules, assignments, study_settings, bank_holidays):
+    study_plan = calculate_study_plan(modules, study_settings, bank_holidays, assignments)
+    return None, lambda _: generate_excel(study_plan, modules)
+
+def save_benchmark(create_storage):
+    """Benchmark saving every collection through the write-behind writer, as save_configuration does"""
+    def bench(modules, assignments, study_settings, bank_holidays):
+        directory = tempfile.TemporaryDirectory(prefix='studyplanner-bench-')
+        TEMP_DIRECTORIES.append(directory)
+        writer = WriteBehindWriter(create_storage(directory.name), {
+            'modules': lambda: [module.to_dict() for module in modules],
+            'assignments': lambda: [assignment.to_dict() for assignment in assignments],
+            'settings': lambda: study_settings.to_dict()
+        }, delay=0)
+        return None, lambda _: writer.mark_dirty()
+    return bench
+
+BENCHMARKS = {
+    'plan_legacy': bench_plan_legacy,
+    'plan_assignments_greedy': bench_plan_greedy,
+    'plan_assignments_edf': bench_plan_edf,
+    'allocate_leave_days': bench_allocate_leave_days,
+    'distribute_study_hours': bench_distribute_study_hours,
+    'generate_html_content': bench_html_export,
+    'generate_excel': bench_excel_export,
+    'save_json': save_benchmark(lambda directory: JsonStorage(directory, fsync='never')),
+    'save_sqlite': save_benchmark(lambda directory: SqliteStorage(os.path.join(directory, 'bench.db'), fsync='never')),
+}
+
+def time_benchmark(benchmark, workload, repeat):
+    """Run a benchmark `repeat` times, returning its best and median times in milliseconds"""
+    setup, run = benchmark(*workload)
+    timings = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        run(argument)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'best_ms': round(min(timings), 3), 'median_ms': round(statistics.median(timings), 3)}
+
+def run_suite(workload_names, name_filter, repeat):
+    """Time every matching benchmark on every named workload"""
+    results = {}
+    for workload_name in workload_names:
+        workload = build_workload(**WORKLOADS[workload_name])
+        for name, benchmark in BENCHMARKS.items():
+            key = f"{workload_name}/{name}"
+            if name_filter and name_filter not in key:
+                continue
+            results[key] = time_benchmark(benchmark, workload, repeat)
+            print(f"{key:<50} best {results[key]['best_ms']:>10.2f} ms  median {results[key]['median_ms']:>10.2f} ms")
+    return results
+
+def compare(results, baseline, threshold):
+    """Print each benchmark's change against the baseline and return the keys that regressed"""
+    regressions = []
+    print(f"\nCompared with baseline ({threshold:.0%} threshold):")
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            print(f"{key:<50} new")
+            continue
+        ratio = result['best_ms'] / previous['best_ms'] if previous['best_ms'] else 1.0
+        slower = ratio > 1 + threshold
+        if slower:
+            regressions.append(key)
+        print(f"{key:<50} {previous['best_ms']:>10.2f} -> {result['best_ms']:>10.2f} ms  {ratio:>6.2f}x{'  SLOWER' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workload', action='append', choices=sorted(WORKLOADS),
+                        help='workload to run (repeatable, default: all)')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose workload/name contains this text')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help='write the results to a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results with a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown that counts as a regression')
+    args = parser.parse_args()
+    
+    results = run_suite(args.workload or list(WORKLOADS), args.filter, args.repeat)
+    
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'repeat': args.repeat,
+                'workloads': {name: WORKLOADS[name] for name in args.workload or WORKLOADS},
+                'results': results
+            }, f, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} benchmarks slowed down by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Seeded synthetic workloads for the benchmarks
+
+Each workload is a set of modules, assignments, study settings and bank
+holidays, generated from a seed so runs (and baselines) stay comparable.
+Dates are offsets from today, so every due date is ahead of the planner's
+start date.
+"""
+import random
+from datetime import datetime, timedelta
+
+from models import as_assignments, as_modules, as_settings
+
+STUDY_DAYS = {
+    'monday': 2, 'tuesday': 2, 'wednesday': 0, 'thursday': 2,
+    'friday': 0, 'saturday': 4, 'sunday': 3
+}
+
+# Named workloads used by the benchmark suite, one dimension stretched at a time
+WORKLOADS = {
+    'small': dict(num_modules=10, assignments_per_module=5, years=1, holiday_density=0.02, leave_days=5),
+    'many-modules': dict(num_modules=500, assignments_per_module=2, years=2, holiday_density=0.02, leave_days=10),
+    'many-assignments': dict(num_modules=50, assignments_per_module=100, years=5, holiday_density=0.02, leave_days=10),
+    'long-horizon': dict(num_modules=20, assignments_per_module=20, years=20, holiday_density=0.02, leave_days=10),
+    'holiday-heavy': dict(num_modules=20, assignments_per_module=20, years=2, holiday_density=0.25, leave_days=60),
+}
+
+def build_workload(num_modules=50, assignments_per_module=20, years=5, holiday_density=0.02,
+                   leave_days=10, seed=42):
+    """
+    Build a seeded synthetic set of modules, assignments, settings and holidays
+    
+    Args:
+        num_modules: Number of modules, each with its own due date for the legacy planner
+        assignments_per_module: Number of assignments given to each module
+        years: Length of the planning horizon
+        holiday_density: Fraction of the horizon's days that are selected bank holidays
+        leave_days: Leave days in the study settings
+        seed: Random seed
+    
+    Returns:
+        Tuple of (Modules, Assignments, StudySettings, bank holiday dictionaries),
+        parsed up front as the app does when it loads its configuration
+    """
+    rng = random.Random(seed)
+    start_date = datetime.now().date()
+    horizon = max(int(years * 365), 1)
+    
+    def future_date():
+        return (start_date + timedelta(days=rng.randint(1, horizon))).strftime('%Y-%m-%d')
+    
+    modules = [
+        {
+            'id': i + 1,
+            'name': f"Module {i + 1}",
+            'hours_required': rng.choice([2, 4, 6, 10, 15]),
+            'days_before': rng.randint(0, 5),
+            'due_date': future_date()
+        }
+        for i in range(num_modules)
+    ]
+    
+    assignments = [
+        {
+            'id': module['id'] * assignments_per_module + i + 1,
+            'module_id': module['id'],
+            'name': f"Assignment {i + 1}",
+            'due_date': future_date()
+        }
+        for module in modules
+        for i in range(assignments_per_module)
+    ]
+    
+    study_settings = {
+        'leave_days': leave_days,
+        'study_days': dict(STUDY_DAYS)
+    }
+    
+    holiday_offsets = rng.sample(range(1, horizon + 1), int(horizon * holiday_density))
+    bank_holidays = [
+        {
+            'date': (start_date + timedelta(days=offset)).strftime('%Y-%m-%d'),
+            'name': 'Holiday',
+            'selected': True,
+            'hours': rng.choice([0, 3, 6])
+        }
+        for offset in sorted(holiday_offsets)
+    ]
+    
+    return as_modules(modules), as_assignments(assignments), as_settings(study_settings), bank_holidays
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+
+from models import Assignment, Module
+
+class ImportValidationError(ValueError):
+    """Raised when an import payload cannot be parsed or fails validation"""
+    
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+def parse_import_payload(body, content_type):
+    """
+    Parse a bulk import payload into lists of module and assignment records
+    
+    Accepts a JSON object with 'modules' and 'assignments' lists, a JSON array,
+    NDJSON (one record per line) or CSV. In the array, NDJSON and CSV forms
+    each record has a 'type' of 'module' or 'assignment'. CSV files have a
+    header row naming the columns: type, id, name, hours_required,
+    days_before, module_id and due_date.
+    
+    Args:
+        body: Request body as text
+        content_type: MIME type of the request body
+    
+    Returns:
+        Tuple of (module records, assignment records)
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    
+    try:
+        if content_type in ('text/csv', 'application/csv'):
+            records = list(csv.DictReader(io.StringIO(body)))
+        elif content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except (ValueError, csv.Error) as e:
+        raise ImportValidationError(f"Could not parse import payload: {e}")
+    
+    if isinstance(records, dict):
+        modules, assignments = records.get('modules', []), records.get('assignments', [])
+        if not isinstance(modules, list) or not isinstance(assignments, list):
+            raise ImportValidationError("'modules' and 'assignments' must be lists of records")
+        return modules, assignments
+    
+    if not isinstance(records, list):
+        raise ImportValidationError("Import payload must be a list of records")
+    
+    modules, assignments = [], []
+    for index, record in enumerate(records):
+        record_type = record.get('type') if isinstance(record, dict) else None
+        if record_type == 'module':
+            modules.append(record)
+        elif record_type == 'assignment':
+            assignments.append(record)
+        else:
+            raise ImportValidationError(f"Record {index} must have a type of 'module' or 'assignment'")
+    return modules, assignments
+
+def validate_records(modules, assignments, known_module_ids):
+    """
+    Validate and parse imported records in a single pass
+    
+    Args:
+        modules: Module records from the payload
+        assignments: Assignment records from the payload
+        known_module_ids: Ids of modules that already exist
+    
+    Returns:
+        Tuple of (Modules, Assignments)
+    
+    Raises:
+        ImportValidationError listing every invalid record
+    """
+    errors = []
+    clean_modules = []
+    clean_assignments = []
+    module_ids = set(known_module_ids)
+    
+    for index, record in enumerate(modules):
+        try:
+            module = Module.from_dict(record)
+        except (AttributeError, ValueError) as e:
+            errors.append({'record': 'module', 'index': index, 'error': _describe(e)})
+            continue
+        if module.id is not None:
+            module_ids.add(module.id)
+        clean_modules.append(module)
+    
+    for index, record in enumerate(assignments):
+        try:
+            assignment = Assignment.from_dict(record)
+            if assignment.module_id not in module_ids:
+                raise ValueError(f"module {assignment.module_id} does not exist")
+        except (AttributeError, ValueError) as e:
+            errors.append({'record': 'assignment', 'index': index, 'error': _describe(e)})
+            continue
+        clean_assignments.append(assignment)
+    
+    if errors:
+        raise ImportValidationError(f"{len(errors)} invalid records", errors)
+    return clean_modules, clean_assignments
+
+def upsert_records(existing, records):
+    """
+    Insert or update records, matching them on id
+    
+    Args:
+        existing: RecordCollection of stored records, updated in place
+        records: Validated records to upsert
+    
+    Returns:
+        Tuple of (number created, number updated)
+    """
+    created = updated = 0
+    for record in records:
+        if existing.upsert(record):
+            created += 1
+        else:
+            updated += 1
+    return created, updated
+
+def _describe(error):
+    if isinstance(error, AttributeError):
+        return "record must be an object"
+    return str(error)
@@ -0,0 +1,102 @@
+import tempfile
+
+from openpyxl import Workbook
+
+from metrics import phase_timer
+
+EXCEL_COLUMNS = ['Date', 'Module', 'Hours', 'Days to Deadline', 'Day Type']
+EXCEL_SPOOL_SIZE = 8 * 1024 * 1024  # Keep workbooks up to 8 MB in memory before spilling to disk
+
+def generate_excel(study_plan, modules=None):
+    """
+    Generate Excel workbook from study plan
+    
+    Rows are streamed straight from the study plan into a write-only workbook,
+    with a summary sheet of hours per module, a sheet of every task and one
+    sheet per module.
+    
+    Args:
+        study_plan: StudyPlan to export
+        modules: Optional list of Modules used to group assignment
+            tasks under their module; without it each task label gets a sheet
+    
+    Returns:
+        File-like object holding the .xlsx data, positioned at the start
+    """
+    timer = phase_timer('generate_excel')
+    workbook = Workbook(write_only=True)
+    summary_sheet = workbook.create_sheet('Summary')
+    all_tasks_sheet = workbook.create_sheet('All Tasks')
+    all_tasks_sheet.append(EXCEL_COLUMNS)
+    
+    module_names = sorted((module.name for module in modules or ()), key=len, reverse=True)
+    sheet_names = {'summary', 'all tasks'}
+    module_for_label = {}
+    module_sheets = {}
+    module_totals = {}
+    
+    for date_str, task in study_plan.rows():
+        row = [date_str, task.module, task.hours, task.days_to_deadline, task.day_type.capitalize()]
+        all_tasks_sheet.append(row)
+        
+        # Work out which module the task belongs to
+        label = task.module
+        if label not in module_for_label:
+            module_for_label[label] = _module_for_label(label, module_names)
+        module_name = module_for_label[label]
+        
+        if module_name not in module_sheets:
+            sheet = workbook.create_sheet(_unique_sheet_name(module_name, sheet_names))
+            sheet.append(EXCEL_COLUMNS)
+            module_sheets[module_name] = sheet
+            module_totals[module_name] = [0, 0]
+        module_sheets[module_name].append(row)
+        
+        totals = module_totals[module_name]
+        totals[0] += task.hours
+        totals[1] += 1
+    timer.lap('rows')
+    
+    summary_sheet.append(['Module', 'Total Hours', 'Study Days'])
+    for module_name, (hours, days) in module_totals.items():
+        summary_sheet.append([module_name, hours, days])
+    summary_sheet.append([
+        'Total',
+        sum(hours for hours, _ in module_totals.values()),
+        sum(days for _, days in module_totals.values())
+    ])
+    timer.lap('summary')
+    
+    # Write to a spooled buffer that only touches disk for very large plans
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXCEL_SPOOL_SIZE)
+    workbook.save(buffer)
+    buffer.seek(0)
+    timer.lap('save')
+    
+    return buffer
+
+def iter_excel_content(study_plan, modules=None):
+    """Generate Excel workbook from study plan as chunks of bytes"""
+    buffer = generate_excel(study_plan, modules)
+    with buffer:
+        yield from iter(lambda: buffer.read(64 * 1024), b'')
+
+def _module_for_label(label, module_names):
+    """Find the module a task label belongs to ("Module" or "Module - Assignment")"""
+    for name in module_names:
+        if label == name or label.startswith(name + ' - '):
+            return name
+    return label
+
+def _unique_sheet_name(name, used_names):
+    """Make a valid Excel sheet name (max 31 chars, no []:*?/\\) not already in use (case-insensitively)"""
+    base = ''.join('_' if char in '[]:*?/\\' else char for char in name).strip("'") or 'Module'
+    base = base[:31]
+    candidate = base
+    counter = 2
+    while candidate.lower() in used_names:
+        suffix = f" ({counter})"
+        candidate = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used_names.add(candidate.lower())
+    return candidate
@@ -0,0 +1,68 @@
+import importlib
+import threading
+
+from metrics import timed_chunks
+
+class Exporter:
+    """
+    An export format whose implementation is imported on first use
+    
+    Args:
+        name: Format name used in /export/<name>
+        target: 'module:function' path of a function returning an iterable of chunks
+        download_name: File name offered to the browser
+        mimetype: MIME type of the export
+        needs_modules: Whether the function also takes the list of modules
+    """
+    
+    def __init__(self, name, target, download_name, mimetype, needs_modules=False):
+        self.name = name
+        self.target = target
+        self.download_name = download_name
+        self.mimetype = mimetype
+        self.needs_modules = needs_modules
+        self._function = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Import the exporter's module (once) and return its function"""
+        if self._function is None:
+            with self._lock:
+                if self._function is None:
+                    module_name, function_name = self.target.split(':')
+                    self._function = getattr(importlib.import_module(module_name), function_name)
+        return self._function
+    
+    def render(self, study_plan, modules=None):
+        """Generate an export of the study plan as an iterable of chunks"""
+        function = self.load()
+        if self.needs_modules:
+            chunks = function(study_plan, modules)
+        else:
+            chunks = function(study_plan)
+        return timed_chunks(f"export_{self.name}", chunks)
+
+def render_export(study_plan, name, modules=None):
+    """Generate a complete export of the study plan in the named format as bytes"""
+    return b''.join(
+        chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+        for chunk in get_exporter(name).render(study_plan, modules)
+    )
+
+_registry = {}
+
+def register_exporter(name, target, download_name, mimetype, needs_modules=False):
+    """Register an export format under name, to be imported from target on first use"""
+    _registry[name] = Exporter(name, target, download_name, mimetype, needs_modules)
+    return _registry[name]
+
+def get_exporter(name):
+    """Return the registered exporter for name, or None"""
+    return _registry.get(name)
+
+register_exporter(
+    'excel', 'excel_export:iter_excel_content', 'study_plan.xlsx',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', needs_modules=True
+)
+register_exporter('pdf', 'pdf_export:iter_pdf_content', 'study_plan.pdf', 'application/pdf')
+register_exporter('html', 'html_export:iter_html_content', 'study_plan.html', 'text/html')
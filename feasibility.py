@@ -0,0 +1,135 @@
+import numpy as np
+from bisect import bisect_left, bisect_right
+from datetime import date
+import itertools
+
+class FeasibilityIndex:
+    """
+    Prefix sums of study capacity and deadline demand for instant slack queries
+    
+    Capacity is the running total of study hours over the calendar's days, and
+    demand the running total of task hours by submission date. The slack at a
+    date is the capacity up to it minus the demand due by it, so each query is
+    a pair of bisections. A suffix minimum over the deadlines' slack answers
+    whether a new task would still fit in O(log A), with a prefix minimum for the
+    deadlines before it.
+    
+    Slack counts every study hour, which matches the 'edf' strategy exactly;
+    the 'greedy' strategy gives each day to one task and may leave some hours
+    of a day unused. Tasks whose submission date has already passed are left
+    out of the demand and counted as overdue.
+    
+    The calendar only runs to the end of the plan. Given the weekly hours,
+    capacity after it is counted at those hours (with any selected holidays)
+    when a query asks for a later date.
+    
+    Args:
+        tasks: (label, hours, submission date, due date) tuples
+        study_calendar: StudyCalendar with study hours and leave applied
+        weekly_hours: Study hours of each weekday, Monday first, for dates after the calendar
+        holidays: HolidayIndex whose selected holidays apply after the calendar (or None)
+    """
+    
+    def __init__(self, tasks, study_calendar, weekly_hours=None, holidays=None):
+        available = np.flatnonzero(study_calendar.hours > 0)
+        first_day = study_calendar.dates[0].item() if len(study_calendar.dates) else date.today()
+        self.start = first_day.toordinal()
+        self.end = self.start + len(study_calendar.dates) - 1
+        self.weekly_hours = weekly_hours
+        self.holidays = holidays
+        self.capacity_ordinals = [day.toordinal() for day in study_calendar.dates[available].tolist()]
+        self.cumulative_capacity = [0.0] + np.cumsum(study_calendar.hours[available]).tolist()
+        
+        upcoming = sorted(
+            (task for task in tasks if task[2].toordinal() >= self.start),
+            key=lambda task: task[2]
+        )
+        self.overdue = len(tasks) - len(upcoming)
+        self.labels = [task[0] for task in upcoming]
+        self.deadlines = [task[2].toordinal() for task in upcoming]
+        self.cumulative_demand = [0.0] + np.cumsum([task[1] for task in upcoming]).tolist()
+        
+        # Slack at each deadline, and the least slack up to and from each one
+        self.slack = [
+            self.capacity_until(deadline) - demand
+            for deadline, demand in zip(self.deadlines, self.cumulative_demand[1:])
+        ]
+        self.least_slack_until = list(itertools.accumulate(self.slack, min))
+        self.least_slack_from = list(itertools.accumulate(reversed(self.slack), min))[::-1]
+    
+    def capacity_until(self, ordinal):
+        """Study hours available from the start of the calendar up to and including a date ordinal"""
+        capacity = self.cumulative_capacity[bisect_right(self.capacity_ordinals, ordinal)]
+        if ordinal > self.end and self.weekly_hours is not None:
+            capacity += self._capacity_after_calendar(ordinal)
+        return capacity
+    
+    def _capacity_after_calendar(self, ordinal):
+        """Study hours from the day after the calendar up to a date ordinal, at the weekly hours"""
+        first = self.end + 1
+        weeks, days = divmod(ordinal - first + 1, 7)
+        
+        # Ordinal 1 (0001-01-01) was a Monday
+        hours = weeks * sum(self.weekly_hours)
+        hours += sum(self.weekly_hours[(first + offset - 1) % 7] for offset in range(days))
+        
+        if self.holidays is not None:
+            holiday_ordinals, holiday_hours = self.holidays.selected_between(
+                date.fromordinal(first), date.fromordinal(ordinal)
+            )
+            for holiday, holiday_hour in zip(holiday_ordinals.tolist(), holiday_hours.tolist()):
+                hours += holiday_hour - self.weekly_hours[(holiday - 1) % 7]
+        return hours
+    
+    def demand_until(self, ordinal):
+        """Hours of the tasks due on or before a date ordinal"""
+        return self.cumulative_demand[bisect_right(self.deadlines, ordinal)]
+    
+    def slack_at(self, day):
+        """Spare study hours up to a date, after every task due by then"""
+        ordinal = day.toordinal()
+        return self.capacity_until(ordinal) - self.demand_until(ordinal)
+    
+    @property
+    def least_slack(self):
+        return self.least_slack_from[0] if self.slack else self.cumulative_capacity[-1]
+    
+    @property
+    def feasible(self):
+        """Whether every upcoming task can be scheduled by its submission date"""
+        return self.least_slack >= -1e-9
+    
+    def slack_with_task(self, hours, submission_date):
+        """
+        Least slack over every deadline if a task needing `hours` by `submission_date` were added
+        
+        The new task lowers the slack at its deadline and every later one by
+        `hours`; earlier deadlines keep theirs.
+        """
+        ordinal = submission_date.toordinal()
+        if ordinal < self.start:
+            return -hours
+        later = bisect_left(self.deadlines, ordinal)
+        least = self.slack_at(submission_date)
+        if later < len(self.deadlines):
+            least = min(least, self.least_slack_from[later])
+        least -= hours
+        if later > 0:
+            least = min(least, self.least_slack_until[later - 1])
+        return least
+    
+    def summary(self):
+        """Feasibility and the slack before each deadline, as a dictionary"""
+        return {
+            'feasible': self.feasible,
+            'least_slack': round(self.least_slack, 2),
+            'overdue': self.overdue,
+            'deadlines': [
+                {
+                    'module': label,
+                    'submission_date': date.fromordinal(deadline).isoformat(),
+                    'slack': round(slack, 2)
+                }
+                for label, deadline, slack in zip(self.labels, self.deadlines, self.slack)
+            ]
+        }
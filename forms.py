@@ -2,11 +2,13 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, DateField, SelectField, SubmitField, FloatField
 from wtforms.validators import DataRequired, NumberRange
 
+from models import MAX_DAYS_BEFORE
+
 class ModuleForm(FlaskForm):
     """Form for adding/editing modules"""
     name = StringField('Module Name', validators=[DataRequired()])
     hours_required = FloatField('Hours Required per Assignment', validators=[DataRequired(), NumberRange(min=0.5)])
-    days_before = IntegerField('Days Before Due Date to Submit', validators=[DataRequired(), NumberRange(min=0)])
+    days_before = IntegerField('Days Before Due Date to Submit', validators=[DataRequired(), NumberRange(min=0, max=MAX_DAYS_BEFORE)])
     submit = SubmitField('Save Module')
 
 class AssignmentForm(FlaskForm):
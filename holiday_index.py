@@ -0,0 +1,250 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import threading
+
+import numpy as np
+
+# Bank holidays moved by royal proclamation, by (year, name)
+MOVED_HOLIDAYS = {
+    (1995, "Early May Bank Holiday"): date(1995, 5, 8),
+    (2002, "Spring Bank Holiday"): date(2002, 6, 4),
+    (2012, "Spring Bank Holiday"): date(2012, 6, 4),
+    (2020, "Early May Bank Holiday"): date(2020, 5, 8),
+    (2022, "Spring Bank Holiday"): date(2022, 6, 2),
+}
+
+# One-off bank holidays, by year
+EXTRA_HOLIDAYS = {
+    1999: [(date(1999, 12, 31), "Millennium Celebrations")],
+    2002: [(date(2002, 6, 3), "Golden Jubilee")],
+    2011: [(date(2011, 4, 29), "Royal Wedding")],
+    2012: [(date(2012, 6, 5), "Diamond Jubilee")],
+    2022: [(date(2022, 6, 3), "Platinum Jubilee"), (date(2022, 9, 19), "State Funeral of Queen Elizabeth II")],
+    2023: [(date(2023, 5, 8), "Coronation of King Charles III")],
+}
+
+def easter_sunday(year):
+    """Date of Easter Sunday in the Gregorian calendar (the anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def uk_bank_holidays(year):
+    """
+    England and Wales bank holidays of a year as sorted (date, name) pairs
+    
+    New Year's Day, Christmas Day and Boxing Day falling on a weekend are
+    replaced by a substitute day: the next weekday that isn't already a
+    holiday. Holidays moved by proclamation and one-off holidays are included.
+    """
+    easter = easter_sunday(year)
+    fixed = _with_substitutes([
+        (date(year, 1, 1), "New Year's Day"),
+        (date(year, 12, 25), "Christmas Day"),
+        (date(year, 12, 26), "Boxing Day")
+    ])
+    holidays = fixed + [
+        (easter - timedelta(days=2), "Good Friday"),
+        (easter + timedelta(days=1), "Easter Monday"),
+        (_first_monday(year, 5), "Early May Bank Holiday"),
+        (_first_monday(year, 6) - timedelta(days=7), "Spring Bank Holiday"),
+        (_first_monday(year, 9) - timedelta(days=7), "Summer Bank Holiday")
+    ]
+    holidays = [(MOVED_HOLIDAYS.get((year, name), day), name) for day, name in holidays]
+    return sorted(holidays + EXTRA_HOLIDAYS.get(year, []))
+
+def _first_monday(year, month):
+    first = date(year, month, 1)
+    return first + timedelta(days=-first.weekday() % 7)
+
+def _with_substitutes(holidays):
+    # Holidays on weekdays keep their date; weekend ones take the next free weekday in turn
+    taken = {day for day, _ in holidays if day.weekday() < 5}
+    observed = []
+    for day, name in holidays:
+        if day.weekday() >= 5:
+            while day.weekday() >= 5 or day in taken:
+                day += timedelta(days=1)
+            taken.add(day)
+            name = f"{name} (substitute day)"
+        observed.append((day, name))
+    return observed
+
+class HolidayIndex:
+    """
+    Sorted ordinal index of bank holidays with per-user selected/hours overrides
+    
+    Holidays are generated a year at a time (UK bank holidays by default) as
+    the planner asks for dates, and kept as a sorted list of date ordinals for
+    range queries by bisection, with a dictionary of positions for O(1)
+    membership. Holidays are unselected with no study hours until a user
+    override says otherwise; saved holidays on dates the generator doesn't
+    know are kept as custom holidays.
+    
+    Updates build new lists and swap them in, so readers never see a
+    half-built index.
+    
+    Args:
+        overrides: Saved holiday dictionaries ('date', 'selected', 'hours' and
+            optionally 'name'), such as study_settings['bank_holidays']
+        generate: Function from a year to its (date, name) holidays, or None
+            for an index of only the given holidays
+    """
+    
+    def __init__(self, overrides=(), generate=uk_bank_holidays):
+        self.generate = generate
+        self._lock = threading.Lock()
+        self._years = frozenset()
+        self._generated = {}
+        self._custom = {}
+        self._overrides = {}
+        self._ordinals = []
+        self._positions = {}
+        self.apply(overrides)
+    
+    @classmethod
+    def from_list(cls, bank_holidays):
+        """Index exactly the given holiday dictionaries, without generating any"""
+        return cls(bank_holidays, generate=None)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def copy(self):
+        """
+        Return an index that can be updated without affecting this one
+        
+        Updates replace the index's dictionaries and lists rather than
+        changing them, so the copy shares them until either index is updated.
+        """
+        clone = HolidayIndex.__new__(HolidayIndex)
+        clone.__setstate__(self.__getstate__())
+        return clone
+    
+    def __contains__(self, day):
+        return day.toordinal() in self._positions
+    
+    def __len__(self):
+        return len(self._ordinals)
+    
+    def cover(self, first_year, last_year):
+        """Generate the holidays of any years in the range not generated yet"""
+        if self.generate is None:
+            return
+        missing = set(range(first_year, last_year + 1)) - self._years
+        if not missing:
+            return
+        
+        with self._lock:
+            missing -= self._years
+            generated = dict(self._generated)
+            for year in missing:
+                for day, name in self.generate(year):
+                    generated[day.toordinal()] = name
+            self._generated = generated
+            self._years = self._years | missing
+            self._rebuild()
+    
+    def apply(self, holidays):
+        """
+        Apply selected/hours overrides from holiday dictionaries
+        
+        Raises:
+            ValueError if a holiday has an invalid date or hours
+        """
+        parsed = []
+        for holiday in holidays:
+            try:
+                day = datetime.strptime(holiday['date'], '%Y-%m-%d').date()
+                hours = float(holiday.get('hours') or 0)
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Invalid holiday: {holiday!r}")
+            if not 0 <= hours <= 24:
+                raise ValueError(f"Holiday hours for {holiday['date']} must be between 0 and 24")
+            parsed.append((day, holiday.get('name'), bool(holiday.get('selected')), hours))
+        
+        if parsed:
+            self.cover(min(day.year for day, *_ in parsed), max(day.year for day, *_ in parsed))
+        
+        with self._lock:
+            custom = dict(self._custom)
+            overrides = dict(self._overrides)
+            for day, name, selected, hours in parsed:
+                ordinal = day.toordinal()
+                if ordinal not in self._generated:
+                    custom[ordinal] = name or 'Holiday'
+                overrides[ordinal] = (selected, hours)
+            self._custom = custom
+            self._overrides = overrides
+            self._rebuild()
+    
+    def _rebuild(self):
+        ordinals = sorted(self._generated.keys() | self._custom.keys())
+        self._positions = {ordinal: position for position, ordinal in enumerate(ordinals)}
+        self._ordinals = ordinals
+    
+    def _holiday(self, ordinal):
+        selected, hours = self._overrides.get(ordinal, (False, 0))
+        return {
+            'date': date.fromordinal(ordinal).isoformat(),
+            'name': self._generated.get(ordinal) or self._custom.get(ordinal),
+            'selected': selected,
+            'hours': int(hours) if float(hours).is_integer() else hours
+        }
+    
+    def get(self, day):
+        """Return the holiday on a date as a dictionary, or None"""
+        ordinal = day.toordinal()
+        return self._holiday(ordinal) if ordinal in self._positions else None
+    
+    def between(self, start_date, end_date):
+        """Every holiday from start_date to end_date (inclusive) as dictionaries, in date order"""
+        self.cover(start_date.year, end_date.year)
+        ordinals = self._ordinals
+        first = bisect_left(ordinals, start_date.toordinal())
+        last = bisect_right(ordinals, end_date.toordinal())
+        return [self._holiday(ordinal) for ordinal in ordinals[first:last]]
+    
+    def selected_between(self, start_date, end_date):
+        """
+        Selected holidays from start_date to end_date (inclusive)
+        
+        Returns:
+            Tuple of (date ordinals, study hours) NumPy arrays
+        """
+        self.cover(start_date.year, end_date.year)
+        ordinals = self._ordinals
+        overrides = self._overrides
+        first = bisect_left(ordinals, start_date.toordinal())
+        last = bisect_right(ordinals, end_date.toordinal())
+        selected = [
+            (ordinal, overrides[ordinal][1])
+            for ordinal in ordinals[first:last]
+            if overrides.get(ordinal, (False,))[0]
+        ]
+        return (
+            np.array([ordinal for ordinal, _ in selected], dtype=np.int64),
+            np.array([hours for _, hours in selected], dtype=float)
+        )
+    
+    def to_settings(self):
+        """The user's overrides and custom holidays as dictionaries to save in the study settings"""
+        overrides = self._overrides
+        return [
+            self._holiday(ordinal)
+            for ordinal in sorted(overrides.keys() | self._custom.keys())
+            if ordinal in self._custom or overrides[ordinal] != (False, 0)
+        ]
@@ -0,0 +1,205 @@
+import calendar
+
+from metrics import phase_timer
+
+def generate_html_content(study_plan):
+    """Generate HTML content from study plan with calendar format"""
+    timer = phase_timer('generate_html_content')
+    content = ''.join(iter_html_content(study_plan))
+    timer.lap('render')
+    return content
+
+def iter_html_content(study_plan):
+    """Generate HTML content from study plan with calendar format, one month at a time"""
+    yield HTML_HEADER
+    
+    for year, month, days in study_plan.iter_months():
+        yield render_month_html(year, month, days)
+    
+    yield HTML_FOOTER
+
+def render_month_html(year, month, days):
+    """Render one month of the study plan as an HTML calendar table"""
+    parts = []
+    
+    # Create calendar for this month
+    parts.append(f"<h2>{calendar.month_name[month]} {year}</h2>")
+    parts.append("""<table class="calendar">
+            <tr>
+                <th>Sunday</th>
+                <th>Monday</th>
+                <th>Tuesday</th>
+                <th>Wednesday</th>
+                <th>Thursday</th>
+                <th>Friday</th>
+                <th>Saturday</th>
+            </tr>
+        """)
+    
+    # Get first day of month and number of days
+    first_weekday, num_days = calendar.monthrange(year, month)  # Monday is 0, Sunday is 6
+    first_weekday = (first_weekday + 1) % 7  # Adjust to make Sunday 0
+    
+    # Generate calendar grid
+    day_counter = 1
+    parts.append("<tr>")
+    
+    # Empty cells for days before the 1st
+    parts.append('<td class="empty"></td>' * first_weekday)
+    
+    # Fill in the days
+    current_weekday = first_weekday
+    while day_counter <= num_days:
+        if current_weekday == 0 and day_counter != 1:
+            parts.append("</tr><tr>")
+        
+        parts.append('<td>')
+        parts.append(f'<div class="day-number">{day_counter}</div>')
+        
+        # Add tasks for this day
+        for task in days.get(day_counter, ()):
+            parts.append(f"""
+                    <div class="task {task.day_type}">
+                        {task.module}<br>
+                        <span class="hours">{task.hours} hrs</span>
+                        <span class="days-to-deadline">({task.days_to_deadline} days to deadline)</span>
+                    </div>
+                    """)
+        
+        parts.append('</td>')
+        
+        day_counter += 1
+        current_weekday = (current_weekday + 1) % 7
+    
+    # Empty cells for days after the last day
+    parts.append('<td class="empty"></td>' * (7 - current_weekday))
+    
+    parts.append("</tr></table>")
+    return ''.join(parts)
+
+HTML_HEADER = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Study Plan Calendar</title>
+        <style>
+            body { 
+                font-family: Arial, sans-serif; 
+                margin: 20px; 
+                color: #333;
+            }
+            h1 { 
+                color: #2c3e50; 
+                text-align: center;
+                margin-bottom: 30px;
+            }
+            h2 {
+                color: #3498db;
+                margin-top: 40px;
+                margin-bottom: 15px;
+                border-bottom: 2px solid #3498db;
+                padding-bottom: 5px;
+            }
+            .calendar {
+                width: 100%;
+                border-collapse: collapse;
+                margin-bottom: 30px;
+            }
+            .calendar th {
+                background-color: #3498db;
+                color: white;
+                text-align: center;
+                padding: 10px;
+                font-weight: bold;
+            }
+            .calendar td {
+                border: 1px solid #ddd;
+                padding: 10px;
+                height: 100px;
+                width: 14.28%;
+                vertical-align: top;
+            }
+            .calendar .day-number {
+                font-weight: bold;
+                font-size: 1.2em;
+                margin-bottom: 5px;
+                text-align: right;
+            }
+            .calendar .empty {
+                background-color: #f9f9f9;
+            }
+            .task {
+                margin-bottom: 5px;
+                padding: 5px;
+                border-radius: 3px;
+                font-size: 0.9em;
+            }
+            .task.holiday {
+                background-color: #ffcccc;
+            }
+            .task.leave {
+                background-color: #ccffcc;
+            }
+            .task.regular {
+                background-color: #cce5ff;
+            }
+            .hours {
+                font-weight: bold;
+            }
+            .days-to-deadline {
+                font-style: italic;
+                font-size: 0.8em;
+            }
+            .legend {
+                margin-top: 20px;
+                margin-bottom: 40px;
+                text-align: center;
+            }
+            .legend-item {
+                display: inline-block;
+                margin: 0 15px;
+            }
+            .legend-color {
+                display: inline-block;
+                width: 20px;
+                height: 20px;
+                margin-right: 5px;
+                vertical-align: middle;
+                border-radius: 3px;
+            }
+            .legend-regular {
+                background-color: #cce5ff;
+            }
+            .legend-holiday {
+                background-color: #ffcccc;
+            }
+            .legend-leave {
+                background-color: #ccffcc;
+            }
+            @media print {
+                .calendar {
+                    page-break-inside: avoid;
+                }
+                h2 {
+                    page-break-before: always;
+                }
+                h2:first-of-type {
+                    page-break-before: avoid;
+                }
+            }
+        </style>
+    </head>
+    <body>
+        <h1>Study Plan Calendar</h1>
+        
+        <div class="legend">
+            <div class="legend-item"><span class="legend-color legend-regular"></span> Regular Study Day</div>
+            <div class="legend-item"><span class="legend-color legend-holiday"></span> Holiday</div>
+            <div class="legend-item"><span class="legend-color legend-leave"></span> Leave Day</div>
+        </div>
+    """
+
+HTML_FOOTER = """
+    </body>
+    </html>
+    """
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+import uuid
+
+class Job:
+    """
+    A background computation run as a chain of stages in the worker pool
+    
+    Attributes:
+        id: Job id used in /api/jobs/<id>
+        kind: What the job computes (e.g. 'plan' or 'export')
+        status: 'queued', 'running', 'finished' or 'failed'
+        result: Result of the last stage once the job has finished
+        error: Error message if the job failed
+    """
+    
+    def __init__(self, key, kind, stages):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.stages = stages
+        self.stages_done = 0
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.future = None
+    
+    @property
+    def progress(self):
+        """Fraction of the job's stages that have completed"""
+        if self.status == 'finished':
+            return 1.0
+        return self.stages_done / len(self.stages)
+    
+    def to_dict(self):
+        status = self.status
+        if status == 'queued' and (self.stages_done or (self.future is not None and self.future.running())):
+            status = 'running'
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': status,
+            'progress': round(self.progress, 2),
+            'result': self.result,
+            'error': self.error
+        }
+
+class JobManager:
+    """
+    Runs study plan and export computations in a pool of worker processes
+    
+    A job is a list of (function, args, finish) stages. Each function runs in
+    a worker process: the first is called with its args, and every later one
+    with the previous stage's output followed by its args. `finish` (if given)
+    is called in this process with the function's return value, and what it
+    returns becomes the stage's output; the last output is the job's result.
+    
+    Jobs are keyed on what they compute, so submitting a job while one with
+    the same key is still in flight returns the existing job.
+    
+    Args:
+        max_workers: Number of worker processes
+        max_finished: Number of finished jobs kept for status queries
+    """
+    
+    def __init__(self, max_workers, max_finished=100):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, key, kind, stages):
+        """Start a job, or return the in-flight job with the same key"""
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job
+            job = Job(key, kind, stages)
+            self._in_flight[key] = job
+            self._jobs[job.id] = job
+            self._trim()
+        
+        self._run_stage(job, 0, None)
+        return job
+    
+    def finished(self, kind, result):
+        """Record a job whose result was already available (e.g. from a cache)"""
+        job = Job(None, kind, [None])
+        job.status = 'finished'
+        job.stages_done = 1
+        job.result = result
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim()
+        return job
+    
+    def get(self, job_id):
+        """Return the job with the given id, or None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def shutdown(self):
+        """Stop the worker processes, cancelling queued stages"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _pool(self):
+        with self._lock:
+            # Workers are only started once the first job is submitted. They are not forked
+            # from the server, whose other threads may hold locks a forked child would inherit.
+            if self._executor is None:
+                start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(start_method)
+                )
+            return self._executor
+    
+    def _run_stage(self, job, index, previous):
+        function, args, _ = job.stages[index]
+        if index > 0:
+            args = (previous,) + tuple(args)
+        try:
+            job.future = self._pool().submit(function, *args)
+        except Exception as e:
+            self._end(job, error=e)
+            return
+        job.future.add_done_callback(lambda future: self._stage_done(job, index, future))
+    
+    def _stage_done(self, job, index, future):
+        _, _, finish = job.stages[index]
+        try:
+            output = future.result()
+            if finish is not None:
+                output = finish(output)
+        except Exception as e:
+            self._end(job, error=e)
+            return
+        
+        job.stages_done = index + 1
+        if job.stages_done < len(job.stages):
+            self._run_stage(job, job.stages_done, output)
+        else:
+            self._end(job, result=output)
+    
+    def _end(self, job, result=None, error=None):
+        with self._lock:
+            if error is not None:
+                job.status = 'failed'
+                job.error = str(error) or type(error).__name__
+            else:
+                job.status = 'finished'
+                job.result = result
+            job.future = None
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+    
+    def _trim(self):
+        # Forget the oldest finished jobs beyond max_finished
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ('finished', 'failed')]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,190 @@
+from bisect import bisect_left
+import threading
+import time
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Counter:
+    """A counter per combination of label values"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, list(zip(self.labelnames, labels)), value) for labels, value in values]
+
+class CounterFunction:
+    """Counters kept elsewhere (such as a cache's hits and misses), read when rendered"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, help, labelnames, collect):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.collect = collect
+    
+    def samples(self):
+        values = sorted(self.collect().items())
+        return [(self.name, list(zip(self.labelnames, labels)), value) for labels, value in values]
+
+class Histogram:
+    """
+    Observation counts in cumulative buckets, with their sum and count, per
+    combination of label values
+    """
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, labels=()):
+        # Each series holds a count per bucket (the last is +Inf), then the sum
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+    
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        
+        samples = []
+        for labels, values in series:
+            pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                samples.append((self.name + '_bucket', pairs + [('le', _format_value(bound))], cumulative))
+            samples.append((self.name + '_sum', pairs, values[-1]))
+            samples.append((self.name + '_count', pairs, cumulative))
+        return samples
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format"""
+    
+    def __init__(self):
+        self._metrics = []
+    
+    def counter(self, name, help, labelnames=()):
+        self._metrics.append(Counter(name, help, labelnames))
+        return self._metrics[-1]
+    
+    def counter_function(self, name, help, labelnames, collect):
+        """Register counters returned by collect() as a {label values: count} dictionary"""
+        self._metrics.append(CounterFunction(name, help, labelnames, collect))
+        return self._metrics[-1]
+    
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self._metrics.append(Histogram(name, help, labelnames, buckets))
+        return self._metrics[-1]
+    
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, pairs, value in metric.samples():
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+registry = MetricsRegistry()
+
+PHASE_SECONDS = registry.histogram(
+    'studyplanner_phase_seconds', 'Time spent in each phase of planning and exporting', ('function', 'phase')
+)
+REQUEST_SECONDS = registry.histogram(
+    'studyplanner_request_seconds', 'Time taken to handle each request', ('method', 'endpoint')
+)
+REQUESTS_TOTAL = registry.counter(
+    'studyplanner_requests_total', 'Requests handled, by response status', ('method', 'endpoint', 'status')
+)
+
+# Timers are no-ops until metrics are enabled (STUDYPLANNER_METRICS in the app)
+enabled = False
+
+def enable(flag=True):
+    """Turn the phase timers and request metrics on or off"""
+    global enabled
+    enabled = flag
+
+class PhaseTimer:
+    """
+    Times consecutive phases of a function
+    
+    Each call to lap() records the time since the previous lap (or since the
+    timer was created) as the named phase.
+    """
+    
+    def __init__(self, function):
+        self.function = function
+        self._last = time.perf_counter()
+    
+    def lap(self, phase):
+        now = time.perf_counter()
+        PHASE_SECONDS.observe(now - self._last, (self.function, phase))
+        self._last = now
+
+class _NullTimer:
+    def lap(self, phase):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def phase_timer(function):
+    """Return a PhaseTimer for function, or one that records nothing while metrics are disabled"""
+    return PhaseTimer(function) if enabled else _NULL_TIMER
+
+def timed_chunks(function, chunks):
+    """Yield the chunks of an export, recording only the time spent generating them"""
+    if not enabled:
+        yield from chunks
+        return
+    
+    elapsed = 0.0
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - started
+        yield chunk
+    PHASE_SECONDS.observe(elapsed, (function, 'generate'))
@@ -0,0 +1,251 @@
+from datetime import date, datetime
+
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Scheduling strategies for assignments: 'greedy' gives each study day to a single
+# assignment, 'edf' shares each day's hours earliest-submission-date first
+STRATEGIES = ('greedy', 'edf')
+
+# Leave day placement: 'earliest' takes the first free weekdays, 'demand' places
+# leave just ahead of the submission dates where study hours fall short
+LEAVE_POLICIES = ('earliest', 'demand')
+
+# Due dates are kept in this window, so the planning horizon (30 days after the last due
+# date) and submission dates (up to MAX_DAYS_BEFORE days before one) are always valid dates
+MIN_DUE_DATE = date(2000, 1, 1)
+MAX_DUE_DATE = date(2099, 12, 31)
+MAX_DAYS_BEFORE = 365
+
+class Module:
+    """
+    A module, parsed and validated once from its dictionary form
+    
+    Attributes:
+        id: Module id (None until the collection allocates one)
+        name: Module name
+        hours_required: Study hours needed per assignment (whole numbers are kept as ints)
+        days_before: Days before each due date that work must be submitted
+        due_ordinal: Date ordinal of the module's own due date (legacy plans), or None
+        assignments: Number of assignments a legacy plan schedules for the module
+    """
+    
+    __slots__ = ('id', 'name', 'hours_required', 'days_before', 'due_ordinal', 'assignments')
+    
+    def __init__(self, id, name, hours_required, days_before, due_ordinal=None, assignments=1):
+        self.id = id
+        self.name = name
+        self.hours_required = hours_required
+        self.days_before = days_before
+        self.due_ordinal = due_ordinal
+        self.assignments = assignments
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Parse a module dictionary
+        
+        Raises:
+            ValueError if a field is missing or invalid
+        """
+        module = cls(
+            _optional_int(data, 'id'),
+            _required_text(data, 'name'),
+            _plain_number(_number(data, 'hours_required', float)),
+            _number(data, 'days_before', int),
+            _optional_date(data.get('due_date')),
+            _number(data, 'assignments', int, default=1)
+        )
+        if not 0.5 <= module.hours_required < float('inf'):
+            raise ValueError("hours_required must be a number of at least 0.5")
+        if not 0 <= module.days_before <= MAX_DAYS_BEFORE:
+            raise ValueError(f"days_before must be between 0 and {MAX_DAYS_BEFORE}")
+        if module.assignments < 1:
+            raise ValueError("assignments must be at least 1")
+        return module
+    
+    @property
+    def due_date(self):
+        return date.fromordinal(self.due_ordinal) if self.due_ordinal is not None else None
+    
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'hours_required': self.hours_required,
+            'days_before': self.days_before
+        }
+        if self.due_ordinal is not None:
+            data['due_date'] = self.due_date.isoformat()
+        if self.assignments != 1:
+            data['assignments'] = self.assignments
+        return data
+
+class Assignment:
+    """
+    An assignment, parsed and validated once from its dictionary form
+    
+    Attributes:
+        id: Assignment id (None until the collection allocates one)
+        module_id: Id of the module the assignment belongs to
+        name: Assignment name
+        due_ordinal: Date ordinal of the due date
+    """
+    
+    __slots__ = ('id', 'module_id', 'name', 'due_ordinal')
+    
+    def __init__(self, id, module_id, name, due_ordinal):
+        self.id = id
+        self.module_id = module_id
+        self.name = name
+        self.due_ordinal = due_ordinal
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Parse an assignment dictionary
+        
+        Raises:
+            ValueError if a field is missing or invalid
+        """
+        due_ordinal = _optional_date(data.get('due_date'))
+        if due_ordinal is None:
+            raise ValueError("due_date is required")
+        return cls(
+            _optional_int(data, 'id'),
+            _number(data, 'module_id', int),
+            _required_text(data, 'name'),
+            due_ordinal
+        )
+    
+    @property
+    def due_date(self):
+        return date.fromordinal(self.due_ordinal)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'module_id': self.module_id,
+            'name': self.name,
+            'due_date': self.due_date.isoformat()
+        }
+
+class StudySettings:
+    """
+    The study settings the planner uses, parsed and validated once
+    
+    Attributes:
+        study_days: Dictionary of weekday names to study hours
+        weekly_hours: Study hours of each weekday, Monday first
+        leave_days: Number of leave days to place
+        strategy: Scheduling strategy (one of STRATEGIES)
+        leave_policy: Leave placement policy (one of LEAVE_POLICIES)
+    """
+    
+    __slots__ = ('study_days', 'weekly_hours', 'leave_days', 'strategy', 'leave_policy')
+    
+    def __init__(self, study_days, leave_days=0, strategy='greedy', leave_policy='earliest'):
+        self.study_days = study_days
+        self.weekly_hours = tuple(float(study_days.get(name, 0)) for name in WEEKDAY_NAMES)
+        self.leave_days = leave_days
+        self.strategy = strategy
+        self.leave_policy = leave_policy
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Parse the planning fields of a study settings dictionary (others are ignored)
+        
+        Raises:
+            ValueError if a field is invalid
+        """
+        study_days = data.get('study_days') or {}
+        if not isinstance(study_days, dict):
+            raise ValueError("study_days must map weekday names to hours")
+        
+        hours = {}
+        for day, value in study_days.items():
+            if day not in WEEKDAY_NAMES:
+                raise ValueError(f"Unknown study day: {day}")
+            try:
+                hours[day] = _plain_number(float(value or 0))
+            except (TypeError, ValueError):
+                raise ValueError(f"Study hours for {day} must be a number")
+            if not 0 <= hours[day] <= 24:
+                raise ValueError(f"Study hours for {day} must be between 0 and 24")
+        
+        leave_days = _number(data, 'leave_days', int, default=0)
+        if leave_days < 0:
+            raise ValueError("leave_days must not be negative")
+        
+        strategy = data.get('strategy') or 'greedy'
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+        
+        leave_policy = data.get('leave_policy') or 'earliest'
+        if leave_policy not in LEAVE_POLICIES:
+            raise ValueError(f"leave_policy must be one of: {', '.join(LEAVE_POLICIES)}")
+        
+        return cls(hours, leave_days, strategy, leave_policy)
+    
+    def to_dict(self):
+        return {
+            'study_days': dict(self.study_days),
+            'leave_days': self.leave_days,
+            'strategy': self.strategy,
+            'leave_policy': self.leave_policy
+        }
+
+def as_modules(modules):
+    """Parse module dictionaries into Modules (Modules are used as they are)"""
+    return [module if isinstance(module, Module) else Module.from_dict(module) for module in modules]
+
+def as_assignments(assignments):
+    """Parse assignment dictionaries into Assignments (Assignments are used as they are)"""
+    return [
+        assignment if isinstance(assignment, Assignment) else Assignment.from_dict(assignment)
+        for assignment in assignments or ()
+    ]
+
+def as_settings(study_settings):
+    """Parse a study settings dictionary into StudySettings (StudySettings are used as they are)"""
+    if isinstance(study_settings, StudySettings):
+        return study_settings
+    return StudySettings.from_dict(study_settings or {})
+
+def _optional_int(data, field):
+    if data.get(field) is None or data.get(field) == '':
+        return None
+    return _number(data, field, int)
+
+def _required_text(data, field):
+    value = str(data.get(field) or '').strip()
+    if not value:
+        raise ValueError(f"{field} is required")
+    return value
+
+def _number(data, field, kind, default=None):
+    value = data.get(field)
+    if value is None or value == '':
+        if default is None:
+            raise ValueError(f"{field} is required")
+        return default
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+
+def _optional_date(value):
+    if value is None or value == '':
+        return None
+    if not isinstance(value, date):
+        try:
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+    if not MIN_DUE_DATE <= value <= MAX_DUE_DATE:
+        raise ValueError(f"Due dates must be between {MIN_DUE_DATE.isoformat()} and {MAX_DUE_DATE.isoformat()}")
+    return value.toordinal()
+
+def _plain_number(value):
+    # Whole numbers are kept as integers, as they were entered
+    return int(value) if float(value).is_integer() else value
@@ -0,0 +1,201 @@
+import calendar
+import zlib
+
+# A4 landscape, in points
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 36
+
+TITLE_SIZE = 18
+HEADER_HEIGHT = 18
+DAY_NUMBER_SIZE = 9
+TASK_SIZE = 6.5
+TASK_LINE_HEIGHT = 8.5
+
+# Rough average Helvetica glyph width as a fraction of the font size
+AVERAGE_CHAR_WIDTH = 0.5
+
+WEEKDAY_HEADERS = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
+# Fill colours (RGB 0-1) matching the HTML export
+HEADER_COLOUR = (0.204, 0.596, 0.859)
+EMPTY_CELL_COLOUR = (0.976, 0.976, 0.976)
+DAY_TYPE_COLOURS = {
+    'regular': (0.8, 0.898, 1.0),
+    'holiday': (1.0, 0.8, 0.8),
+    'leave': (0.8, 1.0, 0.8)
+}
+
+# Fixed object numbers; page content and page objects are numbered from FIRST_PAGE_OBJECT
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+FONT_OBJECT = 3
+BOLD_FONT_OBJECT = 4
+RESOURCES_OBJECT = 5
+FIRST_PAGE_OBJECT = 6
+
+def iter_pdf_content(study_plan):
+    """
+    Generate a PDF calendar of the study plan, one month per page
+    
+    The document is written directly in PDF syntax and yielded object by
+    object, so only one page is held in memory at a time. Every page shares
+    the same font and resource objects.
+    
+    Args:
+        study_plan: StudyPlan to export
+    
+    Yields:
+        Chunks of the PDF file as bytes
+    """
+    writer = _PdfWriter()
+    yield writer.header()
+    yield writer.add_object(CATALOG_OBJECT, f"<< /Type /Catalog /Pages {PAGES_OBJECT} 0 R >>")
+    yield writer.add_object(
+        FONT_OBJECT, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+    yield writer.add_object(
+        BOLD_FONT_OBJECT, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"
+    )
+    yield writer.add_object(
+        RESOURCES_OBJECT,
+        f"<< /Font << /F1 {FONT_OBJECT} 0 R /F2 {BOLD_FONT_OBJECT} 0 R >> /ProcSet [/PDF /Text] >>"
+    )
+    
+    page_objects = []
+    next_object = FIRST_PAGE_OBJECT
+    for year, month, days in study_plan.iter_months():
+        content = _render_month_page(year, month, days)
+        for chunk in writer.add_page(next_object, content):
+            yield chunk
+        page_objects.append(next_object + 1)
+        next_object += 2
+    
+    # A PDF needs at least one page
+    if not page_objects:
+        content = _text(MARGIN, PAGE_HEIGHT - MARGIN - TITLE_SIZE, 'F2', TITLE_SIZE, 'Study Plan Calendar')
+        content += _text(MARGIN, PAGE_HEIGHT - MARGIN - TITLE_SIZE * 3, 'F1', 12, 'No study tasks scheduled.')
+        for chunk in writer.add_page(next_object, content):
+            yield chunk
+        page_objects.append(next_object + 1)
+        next_object += 2
+    
+    kids = ' '.join(f"{number} 0 R" for number in page_objects)
+    yield writer.add_object(PAGES_OBJECT, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objects)} >>")
+    yield writer.trailer(next_object)
+
+class _PdfWriter:
+    """Tracks byte offsets of the objects written so far for the cross-reference table"""
+    
+    def __init__(self):
+        self.position = 0
+        self.offsets = {}
+    
+    def _emit(self, data):
+        self.position += len(data)
+        return data
+    
+    def header(self):
+        return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    
+    def add_object(self, number, body):
+        self.offsets[number] = self.position
+        return self._emit(f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+    
+    def add_stream(self, number, data):
+        self.offsets[number] = self.position
+        compressed = zlib.compress(data, 6)
+        return self._emit(
+            f"{number} 0 obj\n<< /Length {len(compressed)} /Filter /FlateDecode >>\nstream\n".encode('latin-1')
+            + compressed + b"\nendstream\nendobj\n"
+        )
+    
+    def add_page(self, number, content):
+        """Write a page's content stream as object `number` and the page as `number + 1`"""
+        yield self.add_stream(number, content.encode('cp1252', 'replace'))
+        yield self.add_object(
+            number + 1,
+            f"<< /Type /Page /Parent {PAGES_OBJECT} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources {RESOURCES_OBJECT} 0 R /Contents {number} 0 R >>"
+        )
+    
+    def trailer(self, size):
+        xref_position = self.position
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for number in range(1, size):
+            lines.append(f"{self.offsets.get(number, 0):010d} 00000 n \n")
+        lines.append(f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n")
+        return self._emit(''.join(lines).encode('latin-1'))
+
+def _render_month_page(year, month, days):
+    """Build the content stream drawing one month of the study plan"""
+    ops = []
+    
+    # Title
+    title_y = PAGE_HEIGHT - MARGIN - TITLE_SIZE
+    ops.append(_text(MARGIN, title_y, 'F2', TITLE_SIZE, f"{calendar.month_name[month]} {year}"))
+    
+    # Weekday header row
+    first_weekday, num_days = calendar.monthrange(year, month)  # Monday is 0, Sunday is 6
+    first_weekday = (first_weekday + 1) % 7  # Adjust to make Sunday 0
+    weeks = (first_weekday + num_days + 6) // 7
+    
+    cell_width = (PAGE_WIDTH - 2 * MARGIN) / 7
+    header_top = title_y - 12
+    grid_top = header_top - HEADER_HEIGHT
+    cell_height = (grid_top - MARGIN) / weeks
+    
+    ops.append(_rect(MARGIN, grid_top, PAGE_WIDTH - 2 * MARGIN, HEADER_HEIGHT, HEADER_COLOUR))
+    ops.append("1 g\n")
+    for column, name in enumerate(WEEKDAY_HEADERS):
+        x = MARGIN + column * cell_width + (cell_width - len(name) * 9 * AVERAGE_CHAR_WIDTH) / 2
+        ops.append(_text(x, grid_top + 5, 'F2', 9, name))
+    ops.append("0 g\n")
+    
+    max_chars = int((cell_width - 6) / (TASK_SIZE * AVERAGE_CHAR_WIDTH))
+    max_lines = int((cell_height - DAY_NUMBER_SIZE - 6) // TASK_LINE_HEIGHT)
+    
+    for week in range(weeks):
+        cell_top = grid_top - week * cell_height
+        for column in range(7):
+            day = week * 7 + column - first_weekday + 1
+            x = MARGIN + column * cell_width
+            
+            # Cell border, shaded outside the month
+            in_month = 1 <= day <= num_days
+            if not in_month:
+                ops.append(_rect(x, cell_top - cell_height, cell_width, cell_height, EMPTY_CELL_COLOUR))
+            ops.append(f"0.8 G 0.5 w {x:.2f} {cell_top - cell_height:.2f} {cell_width:.2f} {cell_height:.2f} re S\n")
+            if not in_month:
+                continue
+            
+            # Day number, right aligned
+            number = str(day)
+            number_x = x + cell_width - 4 - len(number) * DAY_NUMBER_SIZE * 0.556
+            ops.append(_text(number_x, cell_top - DAY_NUMBER_SIZE - 2, 'F2', DAY_NUMBER_SIZE, number))
+            
+            # Tasks for this day
+            tasks = days.get(day, ())
+            line_y = cell_top - DAY_NUMBER_SIZE - 4 - TASK_LINE_HEIGHT
+            shown = len(tasks) if len(tasks) <= max_lines else max(max_lines - 1, 0)
+            for task in tasks[:shown]:
+                colour = DAY_TYPE_COLOURS.get(task.day_type, DAY_TYPE_COLOURS['regular'])
+                ops.append(_rect(x + 2, line_y - 1.5, cell_width - 4, TASK_LINE_HEIGHT - 0.5, colour))
+                label = f"{task.module} ({task.hours}h, {task.days_to_deadline}d)"
+                if len(label) > max_chars:
+                    label = label[:max_chars - 3] + '...'
+                ops.append(_text(x + 3, line_y, 'F1', TASK_SIZE, label))
+                line_y -= TASK_LINE_HEIGHT
+            if shown < len(tasks):
+                ops.append(_text(x + 3, line_y, 'F1', TASK_SIZE, f"+{len(tasks) - shown} more"))
+    
+    return ''.join(ops)
+
+def _text(x, y, font, size, text):
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    escaped = escaped.replace('\r', ' ').replace('\n', ' ')
+    return f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({escaped}) Tj ET\n"
+
+def _rect(x, y, width, height, colour):
+    red, green, blue = colour
+    return f"q {red:.3f} {green:.3f} {blue:.3f} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f Q\n"
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from datetime import datetime
+import threading
+
+class PlanCache:
+    """
+    Bounded LRU cache of computed study plans
+    
+    Entries are keyed on a configuration version given by the caller (such as
+    the version of the snapshot a plan is computed from) and the current date.
+    The date rolls over at midnight, so stale plans are never served.
+    
+    If a `digest` function is given, it is called once per computed plan and
+    its result (such as a content hash used for ETags) is cached alongside.
+    A digest function can also be given for a single plan.
+    """
+    
+    def __init__(self, max_entries=16, digest=None):
+        self.max_entries = max_entries
+        self.digest = digest
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def current_key(self, version):
+        """Key for the plan of a configuration version on today's date"""
+        return (version, datetime.now().date())
+    
+    def get(self, compute, version):
+        """Return the cached plan for the current key, computing it on a miss"""
+        return self.get_entry(compute, version)[0]
+    
+    def get_entry(self, compute, version, digest=None):
+        """Return the cached (plan, digest) pair for the current key, computing it on a miss"""
+        key = self.current_key(version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        return self.put(key, compute(), digest)
+    
+    def peek(self, key):
+        """Return the cached (plan, digest) pair for key without computing it, or None"""
+        with self._lock:
+            return self._entries.get(key)
+    
+    def put(self, key, study_plan, digest=None):
+        """Cache a plan under key (such as one computed by a background job) and return its entry"""
+        digest = digest or self.digest
+        entry = (study_plan, digest(study_plan) if digest else None)
+        
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        
+        return entry
+    
+    def stats(self):
+        """Return cache counters as a dictionary"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
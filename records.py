@@ -0,0 +1,145 @@
+class RecordCollection:
+    """
+    Ordered collection of records with a constant-time id index
+    
+    Records are parsed objects with an `id` attribute (see models.py), kept
+    in insertion order in a dictionary keyed on id. They can also be grouped
+    by another attribute (such as an assignment's module_id) in a secondary
+    index that is maintained on every change.
+    
+    New ids come from a monotonic counter stored in `counters[name]`, so ids
+    are never reused after a delete. Records loaded without an id, or with an
+    id already taken by an earlier record, are given a fresh one and the
+    collection is flagged as `repaired` so the fix can be saved.
+    
+    Records are not changed once added; an edit upserts a new record with the
+    same id. Copies of a collection can therefore share their records.
+    
+    Args:
+        records: Initial records
+        counters: Dictionary holding the last issued id for each collection
+        name: Key of this collection's counter
+        group_by: Optional field to build the secondary index on
+    """
+    
+    def __init__(self, records, counters, name, group_by=None):
+        self.name = name
+        self.group_by = group_by
+        self.repaired = False
+        self._counters = counters
+        self._records = {}
+        self._groups = {}
+        
+        records = list(records)
+        for record in records:
+            self._observe_id(record.id)
+        for record in records:
+            if record.id is None or record.id in self._records:
+                record.id = self.allocate_id()
+                self.repaired = True
+            self._insert(record)
+    
+    def __iter__(self):
+        return iter(self._records.values())
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def __contains__(self, record_id):
+        return record_id in self._records
+    
+    def get(self, record_id):
+        """Return the record with the given id, or None"""
+        return self._records.get(record_id)
+    
+    def ids(self):
+        """Return a view of every record id"""
+        return self._records.keys()
+    
+    def group(self, value):
+        """Return the records whose group_by field equals value"""
+        return list(self._groups.get(value, {}).values())
+    
+    def to_list(self):
+        """Return the records as a plain list"""
+        return list(self._records.values())
+    
+    def to_dicts(self):
+        """Return the records as a list of dictionaries, for JSON and saving"""
+        return [record.to_dict() for record in self._records.values()]
+    
+    def copy(self, counters=None):
+        """
+        Return a copy that can be changed without affecting this collection
+        
+        The copy shares the records, and allocates ids from `counters` (by
+        default the same counters as this collection).
+        """
+        clone = RecordCollection([], self._counters if counters is None else counters, self.name, self.group_by)
+        clone.repaired = self.repaired
+        clone._records = dict(self._records)
+        clone._groups = {value: dict(group) for value, group in self._groups.items()}
+        return clone
+    
+    def allocate_id(self):
+        """Return a new id that has never been used in this collection"""
+        record_id = self._counters.get(self.name, 0) + 1
+        while record_id in self._records:
+            record_id += 1
+        self._counters[self.name] = record_id
+        return record_id
+    
+    def upsert(self, record):
+        """
+        Replace the record with the same id in place, or add it as a new record
+        
+        Records without an id are given a new one. Returns True if the record
+        was added and False if it replaced an existing one.
+        """
+        record_id = record.id
+        if record_id is not None and record_id in self._records:
+            self._ungroup(self._records[record_id])
+            self._records[record_id] = record
+            self._group(record)
+            return False
+        
+        if not record_id:
+            record.id = self.allocate_id()
+        else:
+            self._observe_id(record_id)
+        self._insert(record)
+        return True
+    
+    def remove(self, record_id):
+        """Remove and return the record with the given id, or None"""
+        record = self._records.pop(record_id, None)
+        if record is not None:
+            self._ungroup(record)
+        return record
+    
+    def remove_group(self, value):
+        """Remove and return every record whose group_by field equals value"""
+        removed = list(self._groups.pop(value, {}).values())
+        for record in removed:
+            del self._records[record.id]
+        return removed
+    
+    def _observe_id(self, record_id):
+        if isinstance(record_id, int) and record_id > self._counters.get(self.name, 0):
+            self._counters[self.name] = record_id
+    
+    def _insert(self, record):
+        self._records[record.id] = record
+        self._group(record)
+    
+    def _group(self, record):
+        if self.group_by is not None:
+            self._groups.setdefault(getattr(record, self.group_by), {})[record.id] = record
+    
+    def _ungroup(self, record):
+        if self.group_by is not None:
+            group = self._groups.get(getattr(record, self.group_by))
+            if group is not None:
+                group.pop(record.id, None)
+                if not group:
+                    del self._groups[getattr(record, self.group_by)]
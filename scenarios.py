@@ -0,0 +1,154 @@
+import numpy as np
+from bisect import bisect_left
+from datetime import datetime
+
+from models import StudySettings, as_settings
+from study_plan import StudyPlan
+from utils import (
+    DAY_HOLIDAY, StudyCalendar, allocate_leave, build_study_calendar, holiday_index, plan_tasks, schedule_edf
+)
+
+MAX_SCENARIOS = 100  # Most settings variants evaluated in one request
+
+class ScenarioPlanner:
+    """
+    Evaluates study settings variants against one set of modules and assignments
+    
+    Modules, assignments and holidays are parsed once, and every variant shares
+    the calendar's dates, weekdays and holidays; a variant only recomputes the
+    hours of each day and its leave days. Variants with the same study days and
+    leave days share one result.
+    
+    Instead of building each plan, a variant replays the planner's allocation
+    over prefix sums of the daily hours: a task starting at free day `c` that
+    needs H hours runs up to the first day where the running total reaches
+    cum[c] + H (or its submission date), found by bisection. The hours match
+    what calculate_study_plan would schedule. Variants using the 'edf'
+    strategy run the earliest-deadline scheduler over the shared tasks.
+    
+    Args:
+        modules: List of Modules
+        bank_holidays: HolidayIndex, or a list of bank holiday dictionaries
+        assignments_data: List of Assignments
+        start_date: First day of the plan (defaults to today)
+    """
+    
+    def __init__(self, modules, bank_holidays, assignments_data, start_date=None):
+        self.start_date = start_date or datetime.now().date()
+        self.assignments_mode = bool(assignments_data)
+        
+        # (task name, hours needed, submission date, due date) in the order the planner allocates them
+        self.tasks, end_date = plan_tasks(modules, assignments_data, self.start_date)
+        self._submission_dates = np.array([task[2] for task in self.tasks], dtype='datetime64[D]')
+        
+        # Calendar with only the holiday hours filled in, shared by every variant
+        self._base = build_study_calendar(self.start_date, end_date, (0,) * 7, holiday_index(bank_holidays))
+        self._holidays = self._base.day_types == DAY_HOLIDAY
+        self._results = {}
+    
+    def evaluate(self, study_settings):
+        """
+        Summarise the plan the given StudySettings would produce
+        
+        Returns:
+            Dictionary with the scheduled, unmet and slack hours (free study
+            hours up to the last submission date) and the unmet hours of each
+            task that could not be fully scheduled
+        """
+        study_settings = as_settings(study_settings)
+        key = (
+            study_settings.weekly_hours, study_settings.leave_days,
+            study_settings.strategy, study_settings.leave_policy
+        )
+        if key not in self._results:
+            self._results[key] = self._evaluate(self.calendar(study_settings), study_settings.strategy)
+        return self._results[key]
+    
+    def calendar(self, study_settings):
+        """Build the study calendar for the given settings from the shared holiday calendar"""
+        study_settings = as_settings(study_settings)
+        base = self._base
+        hours = np.array(study_settings.weekly_hours)[base.weekdays]
+        hours[self._holidays] = base.hours[self._holidays]
+        study_calendar = StudyCalendar(base.dates, base.weekdays, hours, base.day_types.copy())
+        allocate_leave(study_calendar, study_settings, lambda: self.tasks)
+        return study_calendar
+    
+    def _evaluate(self, study_calendar, strategy):
+        available = np.flatnonzero(study_calendar.hours > 0)
+        cumulative = np.concatenate(([0.0], np.cumsum(study_calendar.hours[available]))).tolist()
+        
+        # Number of free days up to and including each task's submission date
+        bounds = np.searchsorted(study_calendar.dates[available], self._submission_dates, side='right').tolist()
+        last_day = max(bounds, default=0)
+        
+        if self.assignments_mode and strategy == 'edf':
+            study_plan = schedule_edf(StudyPlan(), self.tasks, study_calendar.available_days())
+            scheduled_hours = sum(study_plan.hours)
+            unmet = [{'name': label, 'hours': round(hours, 2)} for label, hours in study_plan.unmet]
+            
+            # Every scheduled hour falls on or before the last submission date
+            return self._summary(scheduled_hours, unmet, cumulative[last_day] - scheduled_hours)
+        
+        unmet = []
+        scheduled_hours = 0.0
+        next_free = 0
+        days_used = 0
+        for (name, hours_needed, _, _), bound in zip(self.tasks, bounds):
+            # Assignments take the next free days; legacy modules each start from the first day
+            first_day = next_free if self.assignments_mode else 0
+            end = first_day
+            if hours_needed > 0 and bound > first_day:
+                end = min(bisect_left(cumulative, cumulative[first_day] + hours_needed), bound)
+            
+            allocated = min(hours_needed, cumulative[end] - cumulative[first_day])
+            scheduled_hours += allocated
+            if hours_needed - allocated > 1e-9:
+                unmet.append({'name': name, 'hours': round(hours_needed - allocated, 2)})
+            
+            if self.assignments_mode:
+                next_free = end
+            days_used = max(days_used, end)
+        
+        slack_hours = cumulative[last_day] - cumulative[days_used] if last_day > days_used else 0.0
+        return self._summary(scheduled_hours, unmet, slack_hours)
+    
+    def _summary(self, scheduled_hours, unmet, slack_hours):
+        return {
+            'scheduled_hours': round(scheduled_hours, 2),
+            'unmet_hours': round(sum(task['hours'] for task in unmet), 2),
+            'slack_hours': round(slack_hours, 2),
+            'unmet': unmet
+        }
+
+def merge_settings(study_settings, variant):
+    """
+    Apply a settings variant to the current StudySettings
+    
+    A variant may set 'leave_days', 'leave_policy', 'strategy' and any of the
+    'study_days' hours; days it leaves out keep their current hours.
+    
+    Returns:
+        StudySettings of the variant
+    
+    Raises:
+        ValueError if the variant has unknown keys or invalid values
+    """
+    study_settings = as_settings(study_settings)
+    if not isinstance(variant, dict):
+        raise ValueError("Each variant must be an object")
+    unknown = set(variant) - {'study_days', 'leave_days', 'leave_policy', 'strategy'}
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+    
+    variant_days = variant.get('study_days') or {}
+    if not isinstance(variant_days, dict):
+        raise ValueError("study_days must map weekday names to hours")
+    
+    # Validated the same way as the saved settings
+    return StudySettings.from_dict({
+        'study_days': dict(study_settings.study_days, **variant_days),
+        'leave_days': variant.get('leave_days', study_settings.leave_days),
+        'strategy': variant.get('strategy', study_settings.strategy),
+        'leave_policy': variant.get('leave_policy', study_settings.leave_policy)
+    })
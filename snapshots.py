@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+import threading
+
+from holiday_index import HolidayIndex
+from models import StudySettings
+from records import RecordCollection
+
+class Snapshot:
+    """
+    One immutable version of the app's configuration
+    
+    A published snapshot is never changed: readers can use one for a whole
+    request (planning, rendering and streaming an export) while writers
+    publish newer versions.
+    
+    Attributes:
+        version: Number of the snapshot, increasing with every publish
+        modules: RecordCollection of Modules
+        assignments: RecordCollection of Assignments, grouped by module_id
+        settings: Study settings dictionary as edited by the user (including bank_holidays)
+        plan_settings: StudySettings parsed from the settings
+        bank_holidays: HolidayIndex with the user's overrides applied
+        id_counters: Last id issued for modules and assignments, saved with the settings
+        unparsed: Stored modules and assignments that could not be parsed, by collection
+            name, kept so they are saved back unchanged
+    """
+    
+    __slots__ = (
+        'version', 'modules', 'assignments', 'settings', 'plan_settings', 'bank_holidays', 'id_counters', 'unparsed'
+    )
+    
+    def __init__(self, version, modules, assignments, settings, plan_settings, bank_holidays, id_counters,
+                 unparsed=None):
+        self.version = version
+        self.modules = modules
+        self.assignments = assignments
+        self.settings = settings
+        self.plan_settings = plan_settings
+        self.bank_holidays = bank_holidays
+        self.id_counters = id_counters
+        self.unparsed = unparsed or {}
+    
+    @classmethod
+    def empty(cls):
+        counters = {}
+        return cls(
+            0,
+            RecordCollection([], counters, 'modules'),
+            RecordCollection([], counters, 'assignments', group_by='module_id'),
+            {},
+            StudySettings({}),
+            HolidayIndex(),
+            counters
+        )
+
+class Draft:
+    """
+    Writable copy of a snapshot, made a field at a time
+    
+    Reading modules, assignments, settings, bank_holidays or id_counters returns a private
+    copy (made on first use) that can be changed in place; any field can also
+    be replaced by assigning to it. Fields that are never touched are shared
+    with the snapshot the draft was made from.
+    """
+    
+    def __init__(self, base):
+        self.base = base
+        self.plan_settings = base.plan_settings
+        self.unparsed = base.unparsed
+        self._fields = {}
+    
+    @property
+    def settings(self):
+        if 'settings' not in self._fields:
+            self._fields['settings'] = dict(self.base.settings)
+        return self._fields['settings']
+    
+    @settings.setter
+    def settings(self, settings):
+        self._fields['settings'] = settings
+    
+    @property
+    def id_counters(self):
+        if 'id_counters' not in self._fields:
+            self._fields['id_counters'] = dict(self.base.id_counters)
+        return self._fields['id_counters']
+    
+    @id_counters.setter
+    def id_counters(self, id_counters):
+        self._fields['id_counters'] = id_counters
+    
+    @property
+    def modules(self):
+        if 'modules' not in self._fields:
+            self._fields['modules'] = self.base.modules.copy(self.id_counters)
+        return self._fields['modules']
+    
+    @modules.setter
+    def modules(self, modules):
+        self._fields['modules'] = modules
+    
+    @property
+    def assignments(self):
+        if 'assignments' not in self._fields:
+            self._fields['assignments'] = self.base.assignments.copy(self.id_counters)
+        return self._fields['assignments']
+    
+    @assignments.setter
+    def assignments(self, assignments):
+        self._fields['assignments'] = assignments
+    
+    @property
+    def bank_holidays(self):
+        if 'bank_holidays' not in self._fields:
+            self._fields['bank_holidays'] = self.base.bank_holidays.copy()
+        return self._fields['bank_holidays']
+    
+    @bank_holidays.setter
+    def bank_holidays(self, bank_holidays):
+        self._fields['bank_holidays'] = bank_holidays
+    
+    def snapshot(self, version):
+        """Return the draft as a snapshot with the given version"""
+        fields = self._fields
+        return Snapshot(
+            version,
+            fields.get('modules', self.base.modules),
+            fields.get('assignments', self.base.assignments),
+            fields.get('settings', self.base.settings),
+            self.plan_settings,
+            fields.get('bank_holidays', self.base.bank_holidays),
+            fields.get('id_counters', self.base.id_counters),
+            self.unparsed
+        )
+
+class SnapshotStore:
+    """
+    Versioned copy-on-write store of the app's configuration
+    
+    Readers call current() and keep the snapshot they get, without locking.
+    Writers edit a Draft of the current snapshot under a single writer lock;
+    the new version is published by one reference assignment, so readers see
+    either the old snapshot or the new one, never a half-applied change. An
+    edit that raises publishes nothing.
+    """
+    
+    def __init__(self, snapshot=None):
+        self._current = snapshot or Snapshot.empty()
+        self._write_lock = threading.Lock()
+    
+    def current(self):
+        """Return the latest published snapshot"""
+        return self._current
+    
+    @contextmanager
+    def edit(self):
+        """Yield a Draft of the current snapshot and publish it as the next version"""
+        with self._write_lock:
+            draft = Draft(self._current)
+            yield draft
+            self._current = draft.snapshot(self._current.version + 1)
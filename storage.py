@@ -0,0 +1,431 @@
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Collections saved by every storage backend, in the order they are flushed
+COLLECTIONS = ('modules', 'assignments', 'settings')
+
+# How hard writes are pushed to disk: fsync the file and its directory, the file only, or never
+FSYNC_POLICIES = ('always', 'file', 'never')
+
+class Storage:
+    """
+    Interface for persisting modules, assignments and study settings
+    
+    Backends load and save whole collections for one user namespace, and
+    report when another process has changed the stored data since it was
+    last loaded or saved here.
+    """
+    
+    def load_modules(self):
+        raise NotImplementedError
+    
+    def load_assignments(self):
+        raise NotImplementedError
+    
+    def load_settings(self):
+        raise NotImplementedError
+    
+    def load_all(self):
+        """
+        Load every collection as one consistent version
+        
+        Returns:
+            Tuple of (modules, assignments, settings)
+        """
+        return self.load_modules(), self.load_assignments(), self.load_settings()
+    
+    def save_modules(self, modules):
+        raise NotImplementedError
+    
+    def save_assignments(self, assignments):
+        raise NotImplementedError
+    
+    def save_settings(self, settings):
+        raise NotImplementedError
+    
+    def save_all(self, collections):
+        """
+        Save several collections together
+        
+        Args:
+            collections: Dictionary of collection names (see COLLECTIONS) to their data
+        """
+        for name in COLLECTIONS:
+            if name in collections:
+                getattr(self, f'save_{name}')(collections[name])
+    
+    def has_changed(self):
+        """
+        Return True if the stored data was changed by someone else
+        
+        Backends remember the version (file mtimes or a revision number) they
+        last loaded or wrote. They hold a lock from writing until the new version
+        is recorded, and while checking it, so a check on another thread never
+        mistakes our own write for someone else's.
+        """
+        return False
+    
+    def close(self):
+        pass
+
+class JsonStorage(Storage):
+    """Storage backend keeping each collection in a JSON file in a config directory"""
+    
+    def __init__(self, config_dir, fsync='file'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.config_dir = config_dir
+        self.fsync = fsync
+        self.modules_file = os.path.join(config_dir, 'modules.json')
+        self.assignments_file = os.path.join(config_dir, 'assignments.json')
+        self.settings_file = os.path.join(config_dir, 'settings.json')
+        self._mtimes = {}
+        
+        # Held while a file is replaced and its mtime recorded (see Storage.has_changed)
+        self._lock = threading.Lock()
+        
+        # Create config directory if it doesn't exist
+        if not os.path.exists(config_dir):
+            os.makedirs(config_dir)
+    
+    def _load(self, path, default):
+        if not os.path.exists(path):
+            return default
+        # Take the mtime before reading, so a file replaced meanwhile still counts as changed
+        mtime = os.path.getmtime(path)
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self._mtimes[path] = mtime
+        return data
+    
+    def _save(self, path, data):
+        # Write compactly to a temp file and rename it over the old one, so a
+        # crash mid-write never leaves a truncated config file behind
+        fd, tmp_path = tempfile.mkstemp(dir=self.config_dir, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+                if self.fsync != 'never':
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._lock:
+                os.replace(tmp_path, path)
+                self._mtimes[path] = os.path.getmtime(path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        
+        if self.fsync == 'always':
+            dir_fd = os.open(self.config_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    
+    def load_modules(self):
+        return self._load(self.modules_file, [])
+    
+    def load_assignments(self):
+        return self._load(self.assignments_file, [])
+    
+    def load_settings(self):
+        return self._load(self.settings_file, {})
+    
+    def save_modules(self, modules):
+        self._save(self.modules_file, modules)
+    
+    def save_assignments(self, assignments):
+        self._save(self.assignments_file, assignments)
+    
+    def save_settings(self, settings):
+        self._save(self.settings_file, settings)
+    
+    def has_changed(self):
+        with self._lock:
+            for path in (self.modules_file, self.assignments_file, self.settings_file):
+                mtime = os.path.getmtime(path) if os.path.exists(path) else None
+                if mtime != self._mtimes.get(path):
+                    return True
+            return False
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    user TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user, position)
+);
+
+CREATE TABLE IF NOT EXISTS assignments (
+    user TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id INTEGER,
+    module_id INTEGER,
+    due_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user, position)
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+    user TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS revisions (
+    user TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+
+-- Every query loads a whole namespace, so indexes on the record columns went unused
+DROP INDEX IF EXISTS idx_modules_id;
+DROP INDEX IF EXISTS idx_assignments_id;
+DROP INDEX IF EXISTS idx_assignments_module_id;
+DROP INDEX IF EXISTS idx_assignments_due_date;
+"""
+
+class SqliteStorage(Storage):
+    """
+    Storage backend keeping every user's data in one SQLite database
+    
+    The database runs in WAL mode so several worker processes can read while
+    one writes. Records are stored as JSON alongside their id, module_id and
+    due_date, and each user has a revision counter that is bumped on every
+    save so other workers know to reload. Collections saved together are
+    written in one transaction. Saves replace a whole collection, so when two
+    workers edit the same collection the last save wins.
+    """
+    
+    # SQLite synchronous setting for each fsync policy
+    SYNCHRONOUS = {'always': 'FULL', 'file': 'NORMAL', 'never': 'OFF'}
+    
+    def __init__(self, path, user='default', fsync='file'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.path = path
+        self.user = user
+        self.fsync = fsync
+        self._local = threading.local()
+        self._revision = None
+        
+        # Held from recording a new revision until it is committed (see Storage.has_changed)
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        with self._connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+    
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.SYNCHRONOUS[self.fsync]}')
+            self._local.conn = conn
+        return conn
+    
+    def _current_revision(self, conn):
+        row = conn.execute('SELECT revision FROM revisions WHERE user = ?', (self.user,)).fetchone()
+        return row[0] if row else 0
+    
+    def _bump_revision(self, conn):
+        # Our write only brings us up to date if we had seen every earlier revision;
+        # otherwise another worker saved in between and has_changed() must report it
+        seen = self._current_revision(conn) == self._revision
+        conn.execute(
+            'INSERT INTO revisions (user, revision) VALUES (?, 1) '
+            'ON CONFLICT (user) DO UPDATE SET revision = revision + 1',
+            (self.user,)
+        )
+        if seen:
+            self._revision = self._current_revision(conn)
+    
+    def _select_records(self, conn, table):
+        rows = conn.execute(
+            f'SELECT data FROM {table} WHERE user = ? ORDER BY position', (self.user,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def _select_settings(self, conn):
+        row = conn.execute('SELECT data FROM settings WHERE user = ?', (self.user,)).fetchone()
+        return json.loads(row[0]) if row else {}
+    
+    def load_modules(self):
+        return self._select_records(self._connection(), 'modules')
+    
+    def load_assignments(self):
+        return self._select_records(self._connection(), 'assignments')
+    
+    def load_settings(self):
+        return self._select_settings(self._connection())
+    
+    def load_all(self):
+        conn = self._connection()
+        with conn:
+            # One read transaction sees a single committed revision of every collection
+            conn.execute('BEGIN')
+            revision = self._current_revision(conn)
+            modules = self._select_records(conn, 'modules')
+            assignments = self._select_records(conn, 'assignments')
+            settings = self._select_settings(conn)
+        with self._lock:
+            self._revision = revision
+        return modules, assignments, settings
+    
+    def _write_modules(self, conn, modules):
+        conn.execute('DELETE FROM modules WHERE user = ?', (self.user,))
+        conn.executemany(
+            'INSERT INTO modules (user, position, id, data) VALUES (?, ?, ?, ?)',
+            [
+                (self.user, position, module.get('id'), json.dumps(module))
+                for position, module in enumerate(modules)
+            ]
+        )
+    
+    def _write_assignments(self, conn, assignments):
+        conn.execute('DELETE FROM assignments WHERE user = ?', (self.user,))
+        conn.executemany(
+            'INSERT INTO assignments (user, position, id, module_id, due_date, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    self.user, position, assignment.get('id'), assignment.get('module_id'),
+                    assignment.get('due_date'), json.dumps(assignment)
+                )
+                for position, assignment in enumerate(assignments)
+            ]
+        )
+    
+    def _write_settings(self, conn, settings):
+        conn.execute(
+            'INSERT INTO settings (user, data) VALUES (?, ?) '
+            'ON CONFLICT (user) DO UPDATE SET data = excluded.data',
+            (self.user, json.dumps(settings))
+        )
+    
+    def save_modules(self, modules):
+        self.save_all({'modules': modules})
+    
+    def save_assignments(self, assignments):
+        self.save_all({'assignments': assignments})
+    
+    def save_settings(self, settings):
+        self.save_all({'settings': settings})
+    
+    def save_all(self, collections):
+        # One transaction, so other workers never load some of the collections without the rest
+        conn = self._connection()
+        with self._lock, conn:
+            for name in COLLECTIONS:
+                if name in collections:
+                    getattr(self, f'_write_{name}')(conn, collections[name])
+            self._bump_revision(conn)
+    
+    def has_changed(self):
+        with self._lock:
+            return self._current_revision(self._connection()) != self._revision
+    
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class WriteBehindWriter:
+    """
+    Coalesces saves of dirty collections into delayed, batched writes
+    
+    Callers mark the collections they changed as dirty. The first mark starts
+    a timer, and when it fires every collection marked in the meantime is
+    saved once with its latest data, all in one save_all() call. A delay of
+    zero saves immediately.
+    
+    Args:
+        storage: Storage backend the collections are saved to
+        sources: Dictionary of collection names to functions returning their current data
+        delay: Seconds to wait before flushing dirty collections
+    """
+    
+    def __init__(self, storage, sources, delay=0.5):
+        self.storage = storage
+        self.sources = sources
+        self.delay = delay
+        self._dirty = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+    
+    def mark_dirty(self, *collections):
+        """Schedule the named collections (or all of them) to be saved"""
+        with self._lock:
+            self._dirty.update(collections or self.sources)
+            if self.delay > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+    
+    def flush(self):
+        """Save every dirty collection now"""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            
+            if not dirty:
+                return
+            try:
+                self.storage.save_all({
+                    name: copy.copy(self.sources[name]()) for name in COLLECTIONS if name in dirty
+                })
+            except BaseException:
+                # Keep the collections dirty so the next flush retries them
+                with self._lock:
+                    self._dirty.update(dirty)
+                raise
+
+def create_storage(backend, config_dir, sqlite_path=None, user='default', fsync='file'):
+    """
+    Create the storage backend named in the application config
+    
+    Args:
+        backend: 'json' or 'sqlite'
+        config_dir: Directory holding the JSON config files
+        sqlite_path: Path of the SQLite database (defaults to config_dir/studyplanner.db)
+        user: Namespace of the data in a shared SQLite database
+        fsync: Durability policy for writes, one of FSYNC_POLICIES
+    
+    Returns:
+        Storage instance
+    """
+    if backend == 'json':
+        return JsonStorage(config_dir, fsync)
+    if backend == 'sqlite':
+        return SqliteStorage(sqlite_path or os.path.join(config_dir, 'studyplanner.db'), user, fsync)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def migrate_json_to_sqlite(config_dir, sqlite_path, user='default'):
+    """Import the JSON config files in config_dir into a user's SQLite namespace"""
+    source = JsonStorage(config_dir)
+    target = SqliteStorage(sqlite_path, user)
+    try:
+        modules = source.load_modules()
+        assignments = source.load_assignments()
+        settings = source.load_settings()
+        target.save_all({'modules': modules, 'assignments': assignments, 'settings': settings})
+    finally:
+        target.close()
+    return {'modules': len(modules), 'assignments': len(assignments)}
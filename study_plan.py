@@ -0,0 +1,150 @@
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date
+import itertools
+
+# Day types of the study calendar and planned tasks, indexed by their small-int code
+DAY_TYPES = ('regular', 'holiday', 'leave')
+
+# A single planned task as seen by the exporters
+Task = namedtuple('Task', ['module', 'hours', 'days_to_deadline', 'day_type'])
+
+class StudyPlan:
+    """
+    Computed study plan stored as parallel columns, one row per study task
+    
+    Rows are kept in date order (tasks on the same day in the order they were
+    planned). Each row holds the date as an ordinal, an index into the table
+    of interned task labels ("Module" or "Module - Assignment"), the hours as a
+    float, the days left to the deadline and the day type code. Views for the
+    exporters and the JSON API are built from the columns on demand.
+    
+    Attributes:
+        ordinals: Date of each task as a proleptic Gregorian ordinal
+        label_ids: Index of each task's label in `labels`
+        hours: Hours of study for each task
+        days_to_deadline: Days between each task and its deadline
+        day_types: Day type code of each task (index into DAY_TYPES)
+        labels: Interned task labels
+        unmet: (label, hours) of tasks that could not be fully scheduled
+    """
+    
+    def __init__(self):
+        self.ordinals = array('i')
+        self.label_ids = array('i')
+        self.hours = array('d')
+        self.days_to_deadline = array('i')
+        self.day_types = array('b')
+        self.labels = []
+        self.unmet = []
+        self._label_ids = {}
+    
+    def __len__(self):
+        return len(self.ordinals)
+    
+    def append(self, ordinal, label, hours, days_to_deadline, day_type):
+        """Add a task; rows must be appended in date order or sorted afterwards"""
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        self.ordinals.append(ordinal)
+        self.label_ids.append(label_id)
+        self.hours.append(hours)
+        self.days_to_deadline.append(days_to_deadline)
+        self.day_types.append(day_type)
+    
+    def truncate(self, length, unmet_length=None):
+        """Drop every row from index `length` on, and any unmet entries from `unmet_length` on"""
+        for column in self._columns():
+            del column[length:]
+        if unmet_length is not None:
+            del self.unmet[unmet_length:]
+    
+    def sort_by_date(self):
+        """Stable-sort the rows by date, keeping the planning order within each day"""
+        order = sorted(range(len(self.ordinals)), key=self.ordinals.__getitem__)
+        for column in self._columns():
+            column[:] = array(column.typecode, [column[i] for i in order])
+    
+    def copy(self):
+        """Return an independent copy of the plan"""
+        plan = StudyPlan()
+        plan.ordinals, plan.label_ids, plan.hours, plan.days_to_deadline, plan.day_types = (
+            column[:] for column in self._columns()
+        )
+        plan.labels = list(self.labels)
+        plan.unmet = list(self.unmet)
+        plan._label_ids = dict(self._label_ids)
+        return plan
+    
+    def hash_into(self, hasher):
+        """Feed the plan's content into a hashlib object"""
+        # Label ids depend on interning order, so the labels themselves are hashed instead
+        for column in (self.ordinals, self.hours, self.days_to_deadline, self.day_types):
+            hasher.update(column.tobytes())
+        hasher.update('\0'.join(map(self.labels.__getitem__, self.label_ids)).encode('utf-8'))
+        hasher.update(repr(self.unmet).encode('utf-8'))
+    
+    def task(self, index):
+        """Return the task at row `index`"""
+        return Task(
+            self.labels[self.label_ids[index]],
+            _hours_value(self.hours[index]),
+            self.days_to_deadline[index],
+            DAY_TYPES[self.day_types[index]]
+        )
+    
+    def rows(self):
+        """Yield (date string, task) for every task in date order"""
+        for ordinal, indexes in self._group_by_date(0, len(self.ordinals)):
+            date_str = date.fromordinal(ordinal).isoformat()
+            for index in indexes:
+                yield date_str, self.task(index)
+    
+    def iter_months(self):
+        """Yield (year, month, {day: [tasks]}) for each month of the plan in order"""
+        days_by_month = itertools.groupby(
+            self._group_by_date(0, len(self.ordinals)),
+            key=lambda group: date.fromordinal(group[0]).replace(day=1)
+        )
+        for first_day, days in days_by_month:
+            yield first_day.year, first_day.month, {
+                date.fromordinal(ordinal).day: [self.task(index) for index in indexes]
+                for ordinal, indexes in days
+            }
+    
+    def events_between(self, start, end):
+        """Return compact [date, module, hours, days_to_deadline, day_type] events from start up to end"""
+        first = bisect_left(self.ordinals, start.toordinal())
+        last = bisect_left(self.ordinals, end.toordinal(), first)
+        events = []
+        for ordinal, indexes in self._group_by_date(first, last):
+            date_str = date.fromordinal(ordinal).isoformat()
+            for index in indexes:
+                events.append([date_str, *self.task(index)])
+        return events
+    
+    def unmet_hours(self):
+        """Return [{'module', 'hours'}] for each task that could not be fully scheduled"""
+        return [{'module': label, 'hours': round(hours, 2)} for label, hours in self.unmet]
+    
+    def to_dict(self):
+        """Return the plan as a dictionary of date strings to lists of task dictionaries"""
+        study_plan = {}
+        for date_str, task in self.rows():
+            study_plan.setdefault(date_str, []).append(task._asdict())
+        return study_plan
+    
+    def _columns(self):
+        return (self.ordinals, self.label_ids, self.hours, self.days_to_deadline, self.day_types)
+    
+    def _group_by_date(self, first, last):
+        """Yield (ordinal, row indexes) for each day with tasks between two row indexes"""
+        for ordinal, indexes in itertools.groupby(range(first, last), key=self.ordinals.__getitem__):
+            yield ordinal, list(indexes)
+
+def _hours_value(hours):
+    """Return whole hours as an int so they render the way they were entered"""
+    return int(hours) if hours.is_integer() else hours
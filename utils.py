@@ -1,558 +1,576 @@
-import pandas as pd
-import os
-from datetime import datetime, timedelta
-import calendar
-import tempfile
+import numpy as np
+import hashlib
+import json
+from datetime import date, timedelta
+import heapq
+import threading
+from bisect import bisect_right
+
+from study_plan import DAY_TYPES, StudyPlan
+from metrics import phase_timer
+from holiday_index import HolidayIndex
+from models import as_assignments, as_modules, as_settings
+
+DAY_REGULAR, DAY_HOLIDAY, DAY_LEAVE = range(len(DAY_TYPES))
+LEAVE_DAY_HOURS = 6  # Default 6 hours for leave days
+
+class StudyCalendar:
+    """Per-day study capacity between two dates, held as parallel NumPy arrays
+    
+    Attributes:
+        dates: datetime64[D] array of every date in the horizon
+        weekdays: Weekday of each date (Monday is 0)
+        hours: Hours available for study on each date
+        day_types: Day type code of each date (index into DAY_TYPES)
+    """
+    
+    def __init__(self, dates, weekdays, hours, day_types):
+        self.dates = dates
+        self.weekdays = weekdays
+        self.hours = hours
+        self.day_types = day_types
+        self._available_days = None
+        self._available_dates = None
+    
+    def mark_leave(self, indexes):
+        """Turn the days at the given indexes into leave days and return their dates"""
+        self.hours[indexes] = LEAVE_DAY_HOURS
+        self.day_types[indexes] = DAY_LEAVE
+        self._available_days = None
+        self._available_dates = None
+        return self.dates[indexes].tolist()
+    
+    def available_days(self, until=None):
+        """List the days with study hours, in date order, optionally up to a date"""
+        if self._available_days is None:
+            indexes = np.flatnonzero(self.hours > 0)
+            self._available_days = [
+                {
+                    'date': date,
+                    'ordinal': date.toordinal(),
+                    'hours': hours,
+                    'day_type': day_type
+                }
+                for date, hours, day_type in zip(
+                    self.dates[indexes].tolist(),
+                    self.hours[indexes].tolist(),
+                    self.day_types[indexes].tolist()
+                )
+            ]
+            self._available_dates = [day['date'] for day in self._available_days]
+        
+        if until is None:
+            return self._available_days
+        
+        last_day = bisect_right(self._available_dates, until)
+        return self._available_days[:last_day]
+
+def build_study_calendar(start_date, end_date, weekly_hours, holidays):
+    """
+    Build the study calendar between two dates (inclusive) in a single vectorized pass
+    
+    Args:
+        start_date: First date of the calendar
+        end_date: Last date of the calendar
+        weekly_hours: Study hours of each weekday, Monday first
+        holidays: HolidayIndex whose selected holidays are applied (or None)
+    
+    Returns:
+        StudyCalendar with weekly study hours and holidays applied
+    """
+    dates = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    
+    # Day 0 of datetime64 (1970-01-01) was a Thursday
+    weekdays = (dates.astype(np.int64) + 3) % 7
+    hours = np.array(weekly_hours, dtype=float)[weekdays]
+    day_types = np.full(len(dates), DAY_REGULAR, dtype=np.int8)
+    
+    # Apply selected holidays that fall inside the calendar
+    if holidays is not None and len(dates):
+        holiday_ordinals, holiday_hours = holidays.selected_between(start_date, end_date)
+        holiday_offsets = holiday_ordinals - start_date.toordinal()
+        hours[holiday_offsets] = holiday_hours
+        day_types[holiday_offsets] = DAY_HOLIDAY
+    
+    return StudyCalendar(dates, weekdays, hours, day_types)
 
 def calculate_study_plan(modules, study_settings, bank_holidays, assignments_data=[]):
     """
     Calculate a study plan based on module data, assignments, and study settings
     
+    Modules, assignments and settings are taken as parsed records (see
+    models.py); dictionaries are parsed once on the way in.
+    
     Args:
-        modules: List of module dictionaries
-        study_settings: Dictionary of study settings
-        bank_holidays: List of bank holiday dictionaries
-        assignments_data: List of assignment dictionaries
+        modules: List of Modules
+        study_settings: StudySettings
+        bank_holidays: HolidayIndex, or a list of bank holiday dictionaries
+        assignments_data: List of Assignments
     
     Returns:
-        Dictionary with dates as keys and study tasks as values
+        StudyPlan holding the study tasks in date order, with the hours that
+        could not be scheduled before each task's submission date
     """
     # Initialize empty study plan
-    study_plan = {}
+    study_plan = StudyPlan()
+    timer = phase_timer('calculate_study_plan')
     
-    # Get study days and hours
-    study_days = study_settings.get('study_days', {})
-    leave_days = study_settings.get('leave_days', 0)
+    modules = as_modules(modules)
+    assignments_data = as_assignments(assignments_data)
+    study_settings = as_settings(study_settings)
     
-    # Convert bank holidays to a dict for easier lookup
-    holiday_dict = {}
-    for holiday in bank_holidays:
-        if holiday.get('selected'):
-            holiday_dict[holiday['date']] = {
-                'name': holiday['name'],
-                'hours': holiday['hours']
-            }
+    # Selected holidays are read straight from the holiday index
+    holidays = holiday_index(bank_holidays)
     
     # Calculate start date (today)
-    start_date = datetime.now().date()
+    start_date = date.today()
     
     # If there are no assignments, use the old method with modules
     if not assignments_data:
         # Sort modules by due date (for backward compatibility)
-        sorted_modules = sorted(modules, key=lambda x: datetime.strptime(x.get('due_date', '2099-12-31'), '%Y-%m-%d'))
+        sorted_modules = sort_modules(modules)
         
         # Calculate end date (latest due date + 1 month for buffer)
-        if sorted_modules and 'due_date' in sorted_modules[-1]:
-            latest_due_date = datetime.strptime(sorted_modules[-1]['due_date'], '%Y-%m-%d').date()
-            end_date = latest_due_date + timedelta(days=30)
-        else:
-            end_date = start_date + timedelta(days=90)  # Default 3 months if no modules
-            
-        # Generate all dates between start and end
-        current_date = start_date
-        all_dates = []
-        while current_date <= end_date:
-            all_dates.append(current_date)
-            current_date += timedelta(days=1)
+        end_date = modules_end_date(sorted_modules, start_date)
+        
+        # Build the day-capacity calendar between start and end
+        study_calendar = build_study_calendar(start_date, end_date, study_settings.weekly_hours, holidays)
+        timer.lap('calendar')
         
         # Allocate leave days (if any)
-        leave_day_dates = allocate_leave_days(all_dates, leave_days, holiday_dict, study_days)
+        allocate_leave(study_calendar, study_settings, lambda: module_tasks(sorted_modules))
+        timer.lap('leave')
         
         # For each module, calculate study hours needed and distribute (backward compatibility)
-        for module in sorted_modules:
-            if 'due_date' in module:  # Skip modules without due dates
-                module_name = module['name']
-                assignments = int(module.get('assignments', 1))
-                hours_per_assignment = float(module['hours_required'])
-                due_date = datetime.strptime(module['due_date'], '%Y-%m-%d').date()
-                days_before = int(module['days_before'])
-                
-                # Calculate submission date (due date minus days_before)
-                submission_date = due_date - timedelta(days=days_before)
-                
-                # Calculate total hours needed
-                total_hours_needed = assignments * hours_per_assignment
-                
-                # Distribute study hours
-                distribute_study_hours(
-                    study_plan, module_name, total_hours_needed, 
-                    start_date, submission_date, due_date, 
-                    all_dates, holiday_dict, leave_day_dates, study_days
-                )
+        for module_name, total_hours_needed, submission_date, due_date in module_tasks(sorted_modules):
+            distribute_study_hours(
+                study_plan, module_name, total_hours_needed,
+                submission_date, due_date, study_calendar
+            )
+        
+        # Each module's tasks start from the first free day, so bring the days back into order
+        study_plan.sort_by_date()
+        timer.lap('allocate')
     else:
         # Sort all assignments by due date (earliest first)
-        all_assignments = sorted(assignments_data, key=lambda x: datetime.strptime(x['due_date'], '%Y-%m-%d'))
+        all_assignments = sort_assignments(assignments_data)
         
         # Calculate end date (latest assignment due date + 1 month for buffer)
-        if all_assignments:
-            latest_due_date = datetime.strptime(all_assignments[-1]['due_date'], '%Y-%m-%d').date()
-            end_date = latest_due_date + timedelta(days=30)
-        else:
-            end_date = start_date + timedelta(days=90)  # Default 3 months if no assignments
+        end_date = assignments_end_date(all_assignments, start_date)
         
-        # Generate all dates between start and end
-        current_date = start_date
-        all_dates = []
-        while current_date <= end_date:
-            all_dates.append(current_date)
-            current_date += timedelta(days=1)
+        # Build the day-capacity calendar between start and end
+        study_calendar = build_study_calendar(start_date, end_date, study_settings.weekly_hours, holidays)
+        timer.lap('calendar')
         
         # Allocate leave days (if any)
-        leave_day_dates = allocate_leave_days(all_dates, leave_days, holiday_dict, study_days)
+        tasks = assignment_tasks(all_assignments, modules)
+        allocate_leave(study_calendar, study_settings, lambda: tasks)
+        timer.lap('leave')
         
         # Get all available study days
-        available_study_days = []
-        for date in all_dates:
-            day_name = date.strftime('%A').lower()
-            date_str = date.strftime('%Y-%m-%d')
-            
-            # Check if it's a study day, holiday, or leave day
-            hours_available = 0
-            
-            if date_str in holiday_dict:
-                hours_available = holiday_dict[date_str]['hours']
-                day_type = 'holiday'
-            elif date in leave_day_dates:
-                hours_available = 6  # Default 6 hours for leave days
-                day_type = 'leave'
-            else:
-                hours_available = study_days.get(day_name, 0)
-                day_type = 'regular'
-            
-            if hours_available > 0:
-                available_study_days.append({
-                    'date': date,
-                    'hours': hours_available,
-                    'type': day_type
-                })
-        
-        # Sort available days by date
-        available_study_days.sort(key=lambda x: x['date'])
+        available_study_days = study_calendar.available_days()
         
-        # For each assignment (in order of due date)
-        for assignment in all_assignments:
-            # Find the module
-            module_id = assignment['module_id']
-            module = next((m for m in modules if m['id'] == module_id), None)
-            if not module:
-                continue
-                
-            module_name = module['name']
-            hours_per_assignment = float(module['hours_required'])
-            days_before = int(module['days_before'])
-            assignment_name = assignment['name']
-            due_date = datetime.strptime(assignment['due_date'], '%Y-%m-%d').date()
-            
-            # Calculate submission date (due date minus days_before)
-            submission_date = due_date - timedelta(days=days_before)
-            
-            # Calculate hours needed for this assignment
-            hours_needed = hours_per_assignment
-            
-            # Find available days for this assignment (before submission date)
-            assignment_available_days = [
-                day for day in available_study_days 
-                if day['date'] <= submission_date and 
-                day['date'] not in [d['date'] for d in study_plan.values() if 'date' in d]
-            ]
-            
-            # Distribute hours across available days
-            hours_remaining = hours_needed
-            for day in assignment_available_days:
-                if hours_remaining <= 0:
-                    break
-                    
-                date_str = day['date'].strftime('%Y-%m-%d')
-                hours_for_day = min(day['hours'], hours_remaining)
-                hours_remaining -= hours_for_day
-                
-                # Add to study plan (only one assignment per day)
-                study_plan[date_str] = {
-                    'date': day['date'],
-                    'module': f"{module_name} - {assignment_name}",
-                    'hours': hours_for_day,
-                    'days_to_deadline': (due_date - day['date']).days,
-                    'day_type': day['type']
-                }
-                
-                # Remove this day from available days for other assignments
-                available_study_days = [d for d in available_study_days if d['date'] != day['date']]
-    
-    # Convert study plan to the expected format
-    formatted_study_plan = {}
-    for date_str, task in study_plan.items():
-        if 'date' in task:  # New format
-            formatted_study_plan[date_str] = [
-                {
-                    'module': task['module'],
-                    'hours': task['hours'],
-                    'days_to_deadline': task['days_to_deadline'],
-                    'day_type': task['day_type']
-                }
-            ]
-        else:  # Old format (for backward compatibility)
-            formatted_study_plan[date_str] = task
+        # Allocate days to each assignment (in order of due date)
+        if study_settings.strategy == 'edf':
+            schedule_edf(study_plan, tasks, available_study_days)
+        else:
+            allocate_assignments(study_plan, all_assignments, modules, available_study_days)
+        timer.lap('allocate')
+    
+    return study_plan
+
+def holiday_index(bank_holidays):
+    """Helper function to index a list of bank holiday dictionaries (a HolidayIndex is used as is)"""
+    if isinstance(bank_holidays, HolidayIndex):
+        return bank_holidays
+    return HolidayIndex.from_list(bank_holidays or [])
+
+def sort_modules(modules):
+    """Helper function to sort modules by due date, with modules without one last"""
+    return sorted(modules, key=lambda module: (module.due_ordinal is None, module.due_ordinal or 0))
+
+def sort_assignments(assignments_data):
+    """Helper function to sort assignments by due date"""
+    return sorted(assignments_data, key=lambda assignment: assignment.due_ordinal)
+
+def modules_end_date(sorted_modules, start_date):
+    """Helper function to find the end of the planning horizon for modules sorted by due date"""
+    if sorted_modules and sorted_modules[-1].due_ordinal is not None:
+        return date.fromordinal(sorted_modules[-1].due_ordinal + 30)
+    return start_date + timedelta(days=90)  # Default 3 months if no modules
+
+def assignments_end_date(all_assignments, start_date):
+    """Helper function to find the end of the planning horizon for sorted assignments"""
+    if all_assignments:
+        return date.fromordinal(all_assignments[-1].due_ordinal + 30)
+    return start_date + timedelta(days=90)  # Default 3 months if no assignments
+
+def plan_digest(study_plan, modules=()):
+    """Content hash of a study plan and the module names its exports group tasks under"""
+    hasher = hashlib.sha256()
+    study_plan.hash_into(hasher)
+    hasher.update(json.dumps([module.name for module in modules]).encode('utf-8'))
+    return hasher.hexdigest()
+
+def index_modules(modules):
+    """Helper function to map module ids to modules, keeping the first of any repeated id"""
+    module_index = {}
+    for module in modules:
+        module_index.setdefault(module.id, module)
+    return module_index
+
+def plan_tasks(modules, assignments_data, start_date):
+    """
+    Helper function to list the tasks a plan allocates and find the end of its horizon
     
-    return formatted_study_plan
+    Returns:
+        Tuple of ((label, hours, submission date, due date) tasks in allocation order, end date)
+    """
+    modules = as_modules(modules)
+    if assignments_data:
+        all_assignments = sort_assignments(as_assignments(assignments_data))
+        return assignment_tasks(all_assignments, modules), assignments_end_date(all_assignments, start_date)
+    
+    sorted_modules = sort_modules(modules)
+    return module_tasks(sorted_modules), modules_end_date(sorted_modules, start_date)
 
-def allocate_leave_days(all_dates, leave_days, holiday_dict, study_days):
+def allocate_leave(study_calendar, study_settings, get_tasks):
+    """Helper function to allocate leave days with the settings' leave policy (tasks are only needed for 'demand')"""
+    if study_settings.leave_policy == 'demand':
+        return allocate_leave_days_by_demand(study_calendar, study_settings.leave_days, get_tasks())
+    return allocate_leave_days(study_calendar, study_settings.leave_days)
+
+def allocate_leave_days(study_calendar, leave_days):
     """Helper function to allocate leave days"""
-    leave_day_dates = []
-    if leave_days > 0:
-        # Find suitable dates for leave (prefer weekdays that aren't already study days)
-        potential_leave_days = []
-        for date in all_dates:
-            day_name = date.strftime('%A').lower()
-            date_str = date.strftime('%Y-%m-%d')
+    if leave_days <= 0:
+        return []
+    
+    # Take the first N days as leave days
+    return study_calendar.mark_leave(potential_leave_days(study_calendar)[:leave_days])
+
+def potential_leave_days(study_calendar):
+    """Helper function to find the indexes of days suitable for leave"""
+    # Suitable dates for leave are weekdays that aren't holidays or already study days
+    return np.flatnonzero(
+        (study_calendar.day_types == DAY_REGULAR) &
+        (study_calendar.hours <= 0) &
+        (study_calendar.weekdays < 5)
+    )
+
+def allocate_leave_days_by_demand(study_calendar, leave_days, tasks):
+    """Helper function to place leave days just ahead of the deadlines that need them
+    
+    Prefix sums give, for each submission date, the hours of every task due by
+    then (demand) and the study hours available up to it (capacity). Deadlines
+    are visited in date order, and whenever the leave placed so far doesn't
+    cover a deadline's shortfall, more leave goes on the latest suitable days
+    before it. Any leave left over goes just before the deadline with the
+    least slack, then on the earliest remaining days. Runs in O(D + A log A).
+    
+    Args:
+        study_calendar: StudyCalendar to mark the leave days on
+        leave_days: Number of leave days to place
+        tasks: (label, hours, submission date, due date) tuples
+    """
+    if leave_days <= 0:
+        return []
+    candidates = potential_leave_days(study_calendar)
+    if not len(candidates):
+        return []
+    
+    # Deadlines inside the calendar, in date order, with the demand and capacity up to each
+    first_date = study_calendar.dates[0].item()
+    offsets = np.array([(task[2] - first_date).days for task in tasks], dtype=np.int64)
+    demand_hours = np.array([task[1] for task in tasks], dtype=float)
+    inside = (offsets >= 0) & (offsets < len(study_calendar.dates))
+    order = np.argsort(offsets[inside], kind='stable')
+    offsets = offsets[inside][order]
+    demand = np.cumsum(demand_hours[inside][order])
+    capacity = np.cumsum(study_calendar.hours)[offsets] if len(offsets) else np.zeros(0)
+    leave_needed = np.ceil((demand - capacity) / LEAVE_DAY_HOURS).astype(np.int64).tolist()
+    
+    # Sweep the deadlines, keeping the suitable days before the current one on a stack
+    chosen = []
+    available = []
+    next_candidate = 0
+    for offset, needed in zip(offsets.tolist(), leave_needed):
+        while next_candidate < len(candidates) and candidates[next_candidate] <= offset:
+            available.append(candidates[next_candidate])
+            next_candidate += 1
+        while len(chosen) < min(needed, leave_days) and available:
+            chosen.append(available.pop())
+    
+    # Spare leave goes before the tightest deadline, then on the earliest days left
+    if len(chosen) < leave_days and len(offsets):
+        chosen_sorted = np.sort(np.array(chosen, dtype=np.int64))
+        slack = capacity + LEAVE_DAY_HOURS * np.searchsorted(chosen_sorted, offsets, side='right') - demand
+        tightest = offsets[int(np.argmin(slack))]
+        taken = set(chosen)
+        for index in candidates[candidates <= tightest][::-1].tolist():
+            if len(chosen) >= leave_days:
+                break
+            if index not in taken:
+                chosen.append(index)
+    if len(chosen) < leave_days:
+        taken = set(chosen)
+        spare = [index for index in candidates.tolist() if index not in taken]
+        chosen.extend(spare[:leave_days - len(chosen)])
+    
+    return study_calendar.mark_leave(np.sort(np.array(chosen, dtype=np.int64)))
+
+def allocate_assignments(study_plan, all_assignments, modules, available_study_days,
+                         first=0, next_free=0, checkpoints=None):
+    """Helper function to allocate free study days to assignments
+    
+    Each assignment takes the earliest free days up to its submission date, so
+    the days handed out always form a prefix of the date-sorted pool. A single
+    cursor therefore tracks the next free day, and bisect finds how far each
+    assignment may reach, keeping allocation linear in days plus assignments.
+    
+    Allocation can resume part-way through from assignment index `first` with
+    the cursor at `next_free`. If `checkpoints` is given, the cursor position
+    and the plan's length and unmet length before each assignment are appended
+    to it. Returns the final cursor.
+    """
+    pool_ordinals = [day['ordinal'] for day in available_study_days]
+    module_index = index_modules(modules)
+    
+    for assignment in all_assignments[first:]:
+        if checkpoints is not None:
+            checkpoints.append((next_free, len(study_plan), len(study_plan.unmet)))
+        
+        # Find the module
+        module = module_index.get(assignment.module_id)
+        if not module:
+            continue
+        
+        due_ordinal = assignment.due_ordinal
+        label = f"{module.name} - {assignment.name}"
+        
+        # Free days for this assignment run from the cursor up to the submission date
+        # (due date minus days_before)
+        last_day = bisect_right(pool_ordinals, due_ordinal - module.days_before)
+        
+        # Distribute hours across available days
+        hours_remaining = module.hours_required
+        while next_free < last_day and hours_remaining > 0:
+            day = available_study_days[next_free]
+            next_free += 1
             
-            # Skip if it's a holiday or already a study day
-            if date_str in holiday_dict or study_days.get(day_name, 0) > 0:
-                continue
+            hours_for_day = min(day['hours'], hours_remaining)
+            hours_remaining -= hours_for_day
             
-            # Prefer weekdays
-            if date.weekday() < 5:  # Monday to Friday
-                potential_leave_days.append(date)
+            # Add to study plan (only one assignment per day)
+            study_plan.append(
+                day['ordinal'], label, hours_for_day, due_ordinal - day['ordinal'], day['day_type']
+            )
         
-        # Take the first N days as leave days
-        leave_day_dates = potential_leave_days[:leave_days]
+        if hours_remaining > 0:
+            study_plan.unmet.append((label, hours_remaining))
     
-    return leave_day_dates
+    return next_free
+
+def module_tasks(sorted_modules):
+    """Helper function to resolve modules with due dates to (name, hours, submission date, due date) tasks"""
+    tasks = []
+    for module in sorted_modules:
+        if module.due_ordinal is None:  # Skip modules without due dates
+            continue
+        tasks.append((
+            module.name,
+            module.assignments * module.hours_required,
+            date.fromordinal(module.due_ordinal - module.days_before),
+            date.fromordinal(module.due_ordinal)
+        ))
+    return tasks
 
-def distribute_study_hours(study_plan, task_name, total_hours_needed, start_date, submission_date, due_date, 
-                          all_dates, holiday_dict, leave_day_dates, study_days):
+def assignment_tasks(all_assignments, modules):
+    """Helper function to resolve sorted assignments to (label, hours, submission date, due date) tasks"""
+    module_index = index_modules(modules)
+    tasks = []
+    for assignment in all_assignments:
+        module = module_index.get(assignment.module_id)
+        if not module:
+            continue
+        tasks.append((
+            f"{module.name} - {assignment.name}",
+            module.hours_required,
+            date.fromordinal(assignment.due_ordinal - module.days_before),
+            date.fromordinal(assignment.due_ordinal)
+        ))
+    return tasks
+
+def schedule_edf(study_plan, tasks, available_study_days):
+    """Helper function to schedule tasks earliest submission date first, sharing days between them
+    
+    Open tasks are kept in a heap keyed on submission date. Each study day's
+    hours go to the open task with the earliest submission date until it is
+    done, then to the next, so several tasks can share a day and no hours are
+    left unused while work remains. A task still open after its submission
+    date has passed (or when the days run out) is recorded in the plan's unmet
+    hours. Runs in O((D + A) log A) for D days and A tasks.
+    
+    Args:
+        study_plan: StudyPlan to add the tasks to
+        tasks: (label, hours, submission date, due date) tuples, as from assignment_tasks
+        available_study_days: Days with study hours, in date order
+    """
+    remaining = [hours for _, hours, _, _ in tasks]
+    due_ordinals = [due_date.toordinal() for _, _, _, due_date in tasks]
+    
+    # Ties on submission date go to the task listed first (the earlier due date)
+    open_tasks = [(task[2].toordinal(), index) for index, task in enumerate(tasks) if task[1] > 0]
+    heapq.heapify(open_tasks)
+    
+    for day in available_study_days:
+        ordinal = day['ordinal']
+        
+        # Tasks whose submission date has passed can't be scheduled any more
+        while open_tasks and open_tasks[0][0] < ordinal:
+            _, index = heapq.heappop(open_tasks)
+            study_plan.unmet.append((tasks[index][0], remaining[index]))
+        if not open_tasks:
+            break
+        
+        capacity = day['hours']
+        while open_tasks and capacity > 0:
+            index = open_tasks[0][1]
+            hours = min(capacity, remaining[index])
+            study_plan.append(ordinal, tasks[index][0], hours, due_ordinals[index] - ordinal, day['day_type'])
+            capacity -= hours
+            remaining[index] -= hours
+            if remaining[index] <= 0:
+                heapq.heappop(open_tasks)
+    
+    # Anything still open ran out of study days
+    while open_tasks:
+        _, index = heapq.heappop(open_tasks)
+        study_plan.unmet.append((tasks[index][0], remaining[index]))
+    
+    return study_plan
+
+def distribute_study_hours(study_plan, task_name, total_hours_needed, submission_date, due_date, study_calendar):
     """Helper function to distribute study hours for a task"""
     # Find available study days before submission date
-    available_study_days = []
-    for date in all_dates:
-        if date >= start_date and date <= submission_date:
-            day_name = date.strftime('%A').lower()
-            date_str = date.strftime('%Y-%m-%d')
-            
-            # Check if it's a study day, holiday, or leave day
-            hours_available = 0
-            
-            if date_str in holiday_dict:
-                hours_available = holiday_dict[date_str]['hours']
-                day_type = 'holiday'
-            elif date in leave_day_dates:
-                hours_available = 6  # Default 6 hours for leave days
-                day_type = 'leave'
-            else:
-                hours_available = study_days.get(day_name, 0)
-                day_type = 'regular'
-            
-            if hours_available > 0:
-                available_study_days.append({
-                    'date': date,
-                    'hours': hours_available,
-                    'type': day_type
-                })
+    available_study_days = study_calendar.available_days(until=submission_date)
     
-    # Sort by date
-    available_study_days.sort(key=lambda x: x['date'])
+    due_ordinal = due_date.toordinal()
     
     # Distribute hours across available days
     hours_remaining = total_hours_needed
     for day in available_study_days:
         if hours_remaining <= 0:
             break
-            
-        date_str = day['date'].strftime('%Y-%m-%d')
+        
         hours_for_day = min(day['hours'], hours_remaining)
         hours_remaining -= hours_for_day
         
         # Add to study plan
-        if date_str not in study_plan:
-            study_plan[date_str] = []
-            
-        days_to_deadline = (due_date - day['date']).days
-        
-        study_plan[date_str].append({
-            'module': task_name,
-            'hours': hours_for_day,
-            'days_to_deadline': days_to_deadline,
-            'day_type': day['type']
-        })
-    
-    return study_plan
-
-def generate_excel(study_plan):
-    """Generate Excel file from study plan"""
-    # Convert study plan to DataFrame
-    data = []
-    for date_str, tasks in study_plan.items():
-        for task in tasks:
-            data.append({
-                'Date': date_str,
-                'Module': task['module'],
-                'Hours': task['hours'],
-                'Days to Deadline': task['days_to_deadline'],
-                'Day Type': task['day_type'].capitalize()
-            })
-    
-    df = pd.DataFrame(data)
-    
-    # Create a temporary file
-    fd, path = tempfile.mkstemp(suffix='.xlsx')
-    os.close(fd)
-    
-    # Write to Excel
-    df.to_excel(path, index=False)
-    
-    return path
-
-def generate_pdf(study_plan):
-    """Generate PDF file from study plan"""
-    # For simplicity, we'll generate an HTML file and convert it to PDF
-    html_content = generate_html_content(study_plan)
+        study_plan.append(day['ordinal'], task_name, hours_for_day, due_ordinal - day['ordinal'], day['day_type'])
     
-    # Create a temporary file
-    fd, path = tempfile.mkstemp(suffix='.pdf')
-    os.close(fd)
+    if hours_remaining > 0:
+        study_plan.unmet.append((task_name, hours_remaining))
     
-    # In a real application, you would use a library like WeasyPrint to convert HTML to PDF
-    # For now, we'll just write the HTML to the file
-    with open(path, 'w') as f:
-        f.write(html_content)
-    
-    return path
+    return study_plan
 
-def generate_html(study_plan):
-    """Generate HTML file from study plan"""
-    html_content = generate_html_content(study_plan)
-    
-    # Create a temporary file
-    fd, path = tempfile.mkstemp(suffix='.html')
-    os.close(fd)
-    
-    # Write HTML to file
-    with open(path, 'w') as f:
-        f.write(html_content)
+class IncrementalPlanner:
+    """
+    Study planner that keeps the allocation state of the last assignments plan
     
-    return path
-
-def generate_html_content(study_plan):
-    """Generate HTML content from study plan with calendar format"""
-    # Group tasks by month and year
-    months_data = {}
-    
-    for date_str, tasks in study_plan.items():
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-        month_year = date_obj.strftime('%B %Y')
-        day = date_obj.day
-        
-        if month_year not in months_data:
-            months_data[month_year] = {
-                'year': date_obj.year,
-                'month': date_obj.month,
-                'days': {}
-            }
-        
-        months_data[month_year]['days'][day] = tasks
-    
-    # Generate HTML
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Study Plan Calendar</title>
-        <style>
-            body { 
-                font-family: Arial, sans-serif; 
-                margin: 20px; 
-                color: #333;
-            }
-            h1 { 
-                color: #2c3e50; 
-                text-align: center;
-                margin-bottom: 30px;
-            }
-            h2 {
-                color: #3498db;
-                margin-top: 40px;
-                margin-bottom: 15px;
-                border-bottom: 2px solid #3498db;
-                padding-bottom: 5px;
-            }
-            .calendar {
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 30px;
-            }
-            .calendar th {
-                background-color: #3498db;
-                color: white;
-                text-align: center;
-                padding: 10px;
-                font-weight: bold;
-            }
-            .calendar td {
-                border: 1px solid #ddd;
-                padding: 10px;
-                height: 100px;
-                width: 14.28%;
-                vertical-align: top;
-            }
-            .calendar .day-number {
-                font-weight: bold;
-                font-size: 1.2em;
-                margin-bottom: 5px;
-                text-align: right;
-            }
-            .calendar .empty {
-                background-color: #f9f9f9;
-            }
-            .task {
-                margin-bottom: 5px;
-                padding: 5px;
-                border-radius: 3px;
-                font-size: 0.9em;
-            }
-            .task.holiday {
-                background-color: #ffcccc;
-            }
-            .task.leave {
-                background-color: #ccffcc;
-            }
-            .task.regular {
-                background-color: #cce5ff;
-            }
-            .hours {
-                font-weight: bold;
-            }
-            .days-to-deadline {
-                font-style: italic;
-                font-size: 0.8em;
-            }
-            .legend {
-                margin-top: 20px;
-                margin-bottom: 40px;
-                text-align: center;
-            }
-            .legend-item {
-                display: inline-block;
-                margin: 0 15px;
-            }
-            .legend-color {
-                display: inline-block;
-                width: 20px;
-                height: 20px;
-                margin-right: 5px;
-                vertical-align: middle;
-                border-radius: 3px;
-            }
-            .legend-regular {
-                background-color: #cce5ff;
-            }
-            .legend-holiday {
-                background-color: #ffcccc;
-            }
-            .legend-leave {
-                background-color: #ccffcc;
-            }
-            @media print {
-                .calendar {
-                    page-break-inside: avoid;
-                }
-                h2 {
-                    page-break-before: always;
-                }
-                h2:first-of-type {
-                    page-break-before: avoid;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <h1>Study Plan Calendar</h1>
-        
-        <div class="legend">
-            <div class="legend-item"><span class="legend-color legend-regular"></span> Regular Study Day</div>
-            <div class="legend-item"><span class="legend-color legend-holiday"></span> Holiday</div>
-            <div class="legend-item"><span class="legend-color legend-leave"></span> Leave Day</div>
-        </div>
+    Assignments are allocated earliest-deadline first, so a change can only
+    affect allocations from the first assignment (in due date order) whose
+    details differ. Everything before it is reused, and only the suffix of the
+    timeline from that assignment's checkpoint is replanned. Changes to the
+    calendar itself (settings, holidays, horizon or the current date) fall
+    back to a full recompute. Results match calculate_study_plan exactly.
     """
     
-    # Sort months chronologically
-    sorted_months = sorted(months_data.items(), key=lambda x: (x[1]['year'], x[1]['month']))
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
     
-    for month_year, data in sorted_months:
-        year = data['year']
-        month = data['month']
+    def plan(self, modules, study_settings, bank_holidays, assignments_data):
+        """Return the study plan, replanning only what changed since the last call"""
+        study_settings = as_settings(study_settings)
         
-        # Create calendar for this month
-        html += f"<h2>{month_year}</h2>"
-        html += """<table class="calendar">
-            <tr>
-                <th>Sunday</th>
-                <th>Monday</th>
-                <th>Tuesday</th>
-                <th>Wednesday</th>
-                <th>Thursday</th>
-                <th>Friday</th>
-                <th>Saturday</th>
-            </tr>
-        """
+        # Only greedy assignment plans with leave placed up front can be resumed part-way through
+        if (not assignments_data or study_settings.strategy == 'edf'
+                or study_settings.leave_policy == 'demand'):
+            with self._lock:
+                self._state = None
+            return calculate_study_plan(modules, study_settings, bank_holidays, assignments_data)
         
-        # Get first day of month and number of days
-        first_day = datetime(year, month, 1)
-        if month == 12:
-            last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            last_day = datetime(year, month + 1, 1) - timedelta(days=1)
+        timer = phase_timer('incremental_plan')
+        modules = as_modules(modules)
+        leave_days = study_settings.leave_days
+        holidays = holiday_index(bank_holidays)
+        start_date = date.today()
         
-        num_days = last_day.day
-        first_weekday = first_day.weekday()  # Monday is 0, Sunday is 6
-        first_weekday = (first_weekday + 1) % 7  # Adjust to make Sunday 0
+        all_assignments = sort_assignments(as_assignments(assignments_data))
+        end_date = assignments_end_date(all_assignments, start_date)
         
-        # Generate calendar grid
-        day_counter = 1
-        html += "<tr>"
+        calendar_key = (
+            start_date, end_date, leave_days, study_settings.weekly_hours,
+            tuple(zip(*(column.tolist() for column in holidays.selected_between(start_date, end_date))))
+        )
+        module_index = index_modules(modules)
+        signatures = [_assignment_signature(assignment, module_index) for assignment in all_assignments]
         
-        # Empty cells for days before the 1st
-        for i in range(first_weekday):
-            html += '<td class="empty"></td>'
-        
-        # Fill in the days
-        current_weekday = first_weekday
-        while day_counter <= num_days:
-            if current_weekday == 0 and day_counter != 1:
-                html += "</tr><tr>"
+        with self._lock:
+            state = self._state
+            if state is None or state['calendar_key'] != calendar_key:
+                study_calendar = build_study_calendar(start_date, end_date, study_settings.weekly_hours, holidays)
+                timer.lap('calendar')
+                allocate_leave_days(study_calendar, leave_days)
+                timer.lap('leave')
+                state = {
+                    'calendar_key': calendar_key,
+                    'available_days': study_calendar.available_days(),
+                    'signatures': [],
+                    'checkpoints': [],
+                    'cursor': 0,
+                    'study_plan': StudyPlan()
+                }
             
-            html += f'<td>'
-            html += f'<div class="day-number">{day_counter}</div>'
+            # Find the first assignment whose allocation may have changed
+            first = 0
+            for first, (old, new) in enumerate(zip(state['signatures'], signatures)):
+                if old != new:
+                    break
+            else:
+                first = min(len(state['signatures']), len(signatures))
             
-            # Add tasks for this day
-            if day_counter in data['days']:
-                tasks = data['days'][day_counter]
-                for task in tasks:
-                    task_class = task['day_type']
-                    module_name = task['module']
-                    hours = task['hours']
-                    days_to_deadline = task['days_to_deadline']
-                    
-                    html += f"""
-                    <div class="task {task_class}">
-                        {module_name}<br>
-                        <span class="hours">{hours} hrs</span>
-                        <span class="days-to-deadline">({days_to_deadline} days to deadline)</span>
-                    </div>
-                    """
+            # Roll the allocation back to the cursor and plan length before that assignment
+            checkpoints = state['checkpoints']
+            study_plan = state['study_plan']
+            if first < len(checkpoints):
+                next_free, plan_length, unmet_length = checkpoints[first]
+                study_plan.truncate(plan_length, unmet_length)
+            else:
+                next_free = state['cursor']
+            del checkpoints[first:]
             
-            html += '</td>'
+            # Replan the affected suffix of the timeline
+            cursor = allocate_assignments(
+                study_plan, all_assignments, modules, state['available_days'],
+                first=first, next_free=next_free, checkpoints=checkpoints
+            )
+            timer.lap('allocate')
             
-            day_counter += 1
-            current_weekday = (current_weekday + 1) % 7
-        
-        # Empty cells for days after the last day
-        for i in range(current_weekday, 7):
-            html += '<td class="empty"></td>'
-        
-        html += "</tr></table>"
-    
-    html += """
-    </body>
-    </html>
-    """
-    
-    return html
+            state['signatures'] = signatures
+            state['cursor'] = cursor
+            self._state = state
+            
+            study_plan = study_plan.copy()
+            timer.lap('finalize')
+            return study_plan
+
+def _assignment_signature(assignment, module_index):
+    """Everything about an assignment that affects its allocation"""
+    module = module_index.get(assignment.module_id)
+    if module is None:
+        return (assignment.module_id, None)
+    return (
+        assignment.module_id, assignment.name, assignment.due_ordinal,
+        module.name, module.hours_required, module.days_before
+    )